@@ -1,25 +1,37 @@
 import pygame
-from pygame.sprite import Group
 from pygame.locals import *
 import cv2
 import sys
 import time
 import os
+import random
 
 from settings import Settings
 from game_stats import GameStats
 from scoreboard import Scoreboard
 from button import Button
 from ship import Ship
+from bullet import Bullets
+from fleet import Fleet
+from game_clock import GameClock
+from renderer import Renderer
+from score_writer import HighScoreWriter
+from leaderboard import LeaderboardCache, LeaderboardOverlay
+from profiler import profiler, ProfilerOverlay
+from input_log import InputRecorder
 import game_functions as gf
 from hand_control import HandController
+from camera_service import CameraService
 from player_auth import PlayerAuth
 from auth_ui import AuthUI
+from auth_jobs import AuthWorker
 
 def run_game():
     # Initialize pygame and authentication
     pygame.init()
-    auth = PlayerAuth()
+    # One camera, kept open from the login screen through the game
+    camera = CameraService()
+    auth = PlayerAuth(camera)
     auth_ui = AuthUI()
     
     # Show authentication screen
@@ -27,17 +39,39 @@ def run_game():
     pygame.display.set_caption(auth_ui.title)
     
     authenticated = False
+    # Once logged in, the success message stays up until this time
+    leave_at = None
     current_player = None
     registration_mode = False
     last_capture_time = 0
     capture_cooldown = 1
     
+    # Captures and face checks run on a worker, so the screen keeps drawing
+    auth_worker = AuthWorker(auth)
+    
     # Authentication loop
     clock = pygame.time.Clock()
-    while not authenticated:
-        preview_frame = auth.get_camera_frame(mirror=True)
+    while leave_at is None or time.monotonic() < leave_at:
+        # The preview mirrors the small copy it draws, not the camera frame
+        preview_frame = auth.get_camera_frame(mirror=False)
         if preview_frame is not None:
             auth_ui.update_camera_preview(preview_frame)
+        auth_worker.track()
+        
+        # Show the running job's progress, and its result once it's done
+        job = auth_worker.poll()
+        if job:
+            auth_ui.message = job.message
+            auth_ui.message_color = (0, 255, 0) if job.success else (255, 0, 0)
+            if job.photo is not None:
+                cv2.imshow("Verification Photo", job.photo)
+                cv2.waitKey(1)
+            if job.success:
+                authenticated = True
+                leave_at = time.monotonic() + 1
+                auth_ui.username = job.username
+                current_player = auth_ui.username
+        auth_ui.progress = auth_worker.job.state if auth_worker.busy() else None
         
         auth_ui.create_auth_ui(auth_screen, registration_mode)
         pygame.display.flip()
@@ -47,15 +81,20 @@ def run_game():
         
         for event in events:
             if event.type == QUIT:
-                auth.release_camera()
+                auth_worker.shutdown()
+                camera.release()
                 pygame.quit()
                 sys.exit()
                 
             if event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
-                    auth.release_camera()
+                    auth_worker.shutdown()
+                    camera.release()
                     pygame.quit()
                     sys.exit()
+                
+                if authenticated:
+                    continue
                     
                 # Handle text input
                 if auth_ui.active_input == "username":
@@ -70,34 +109,11 @@ def run_game():
                         auth_ui.password += event.unicode
                         
                 elif event.key == K_RETURN and current_time - last_capture_time > capture_cooldown:
-                    last_capture_time = current_time
-                    auth_ui.message = "Capturing photo..."
-                    auth_ui.message_color = (255, 255, 0)
-                    pygame.display.flip()
-                    
-                    photo = auth.capture_photo()
-                    if photo is not None:
-                        cv2.imshow("Verification Photo", photo)
-                        cv2.waitKey(1)
-                        
-                        success = False
-                        if registration_mode:
-                            success = auth.register_player(auth_ui.username, auth_ui.password, photo)
-                            auth_ui.message = "Registration successful!" if success else "Username exists or no face detected!"
-                        else:
-                            success = auth.verify_player(auth_ui.username, auth_ui.password, photo)
-                            auth_ui.message = "Login successful!" if success else "Invalid credentials or face mismatch!"
-                        
-                        auth_ui.message_color = (0, 255, 0) if success else (255, 0, 0)
-                        
-                        if success:
-                            pygame.display.flip()
-                            time.sleep(1)
-                            authenticated = True
-                            current_player = auth_ui.username
-                            cv2.destroyWindow("Verification Photo")
+                    if auth_worker.submit(registration_mode, auth_ui.username, auth_ui.password):
+                        last_capture_time = current_time
             
-            if event.type == MOUSEBUTTONDOWN and current_time - last_capture_time > capture_cooldown:
+            if (event.type == MOUSEBUTTONDOWN and not authenticated and
+                    current_time - last_capture_time > capture_cooldown):
                 mouse_pos = pygame.mouse.get_pos()
                 
                 if auth_ui.username_rect.collidepoint(mouse_pos):
@@ -113,42 +129,23 @@ def run_game():
                     registration_mode = True
                     auth_ui.message = ""
                 elif auth_ui.capture_rect.collidepoint(mouse_pos):
-                    last_capture_time = current_time
-                    auth_ui.message = "Capturing photo..."
-                    auth_ui.message_color = (255, 255, 0)
-                    pygame.display.flip()
-                    
-                    photo = auth.capture_photo()
-                    if photo is not None:
-                        cv2.imshow("Verification Photo", photo)
-                        cv2.waitKey(1)
-                        
-                        success = False
-                        if registration_mode:
-                            success = auth.register_player(auth_ui.username, auth_ui.password, photo)
-                            auth_ui.message = "Registration successful!" if success else "Username exists or no face detected!"
-                        else:
-                            success = auth.verify_player(auth_ui.username, auth_ui.password, photo)
-                            auth_ui.message = "Login successful!" if success else "Invalid credentials or face mismatch!"
-                        
-                        auth_ui.message_color = (0, 255, 0) if success else (255, 0, 0)
-                        
-                        if success:
-                            pygame.display.flip()
-                            time.sleep(1)
-                            authenticated = True
-                            current_player = auth_ui.username
-                            cv2.destroyWindow("Verification Photo")
+                    if auth_worker.submit(registration_mode, auth_ui.username, auth_ui.password):
+                        last_capture_time = current_time
         
         clock.tick(30)
     
+    auth_worker.shutdown()
+    cv2.destroyWindow("Verification Photo")
+    
     # Initialize game after authentication
     ai_settings = Settings()
     screen = pygame.display.set_mode((ai_settings.screen_width, ai_settings.screen_height))
     pygame.display.set_caption(f"Alien Invasion - Player: {current_player}")
     
     # Initialize game components
-    hand_controller = HandController()
+    hand_controller = HandController(
+        camera, adaptive=ai_settings.adaptive_hand_tracking,
+        frame_budget=ai_settings.hand_frame_budget)
     play_button = Button(ai_settings, screen, "Play")
     stats = GameStats(ai_settings)
     stats.player_name = current_player
@@ -159,54 +156,118 @@ def run_game():
         stats.high_score = player_data['high_score']
     
     sb = Scoreboard(ai_settings, screen, stats)
+    # High scores are saved in the background so the game never waits on
+    # MongoDB; each one written refreshes the cached leaderboard.
+    leaderboard = LeaderboardCache(auth)
+    sb.leaderboard = LeaderboardOverlay(ai_settings, screen, leaderboard, current_player)
+    score_writer = HighScoreWriter(
+        auth, on_written=lambda username, score: leaderboard.invalidate())
+    saved_high_score = stats.high_score
+    was_active = stats.game_active
     ship = Ship(ai_settings, screen)
-    bullets = Group()
-    aliens = Group()
+    bullets = Bullets(ai_settings, screen)
+    aliens = Fleet(ai_settings, screen)
     gf.create_fleet(ai_settings, screen, ship, aliens)
+    game_clock = GameClock(ai_settings)
+    renderer = Renderer(ai_settings, screen)
+    
+    # Frame phase timings, shown with F3 and optionally exported
+    profiler.export_path = ai_settings.profile_export_path
+    profiler.export_interval = ai_settings.profile_export_interval
+    profiler.enabled = bool(profiler.export_path)
+    sb.profile_overlay = ProfilerOverlay(ai_settings, screen, profiler)
+    
+    # Record this session's inputs, so replay.py can play it back
+    recorder = None
+    if ai_settings.recording_dir:
+        seed = random.randrange(2 ** 32)
+        random.seed(seed)
+        os.makedirs(ai_settings.recording_dir, exist_ok=True)
+        recording_path = os.path.join(ai_settings.recording_dir,
+                                      time.strftime("session-%Y%m%d-%H%M%S.ail"))
+        recorder = InputRecorder(recording_path, ai_settings, seed, stats.high_score)
 
-    # Main game loop
+    # Main game loop; check_events() leaves through sys.exit() on quit,
+    # so the cleanup that must happen is in the finally block
     running = True
-    while running:
-        # Get hand landmarks
-        hand_landmarks, camera_frame = hand_controller.get_hand_landmarks()
+    try:
+        while running:
+            game_clock.tick(stats.game_active)
         
-        # Show camera feed
-        if camera_frame is not None:
-            cv2.imshow('Hand Controls', camera_frame)
-            cv2.waitKey(1)
+            # Get hand landmarks
+            with profiler.phase('hands.get'):
+                hand_landmarks, camera_frame = hand_controller.get_hand_landmarks()
         
-        # Handle gestures and events
-        gf.check_hand_gesture(hand_landmarks, ai_settings, screen, ship, bullets, hand_controller)
+            # Show camera feed
+            if camera_frame is not None:
+                with profiler.phase('imshow'):
+                    cv2.imshow('Hand Controls', camera_frame)
+                    cv2.waitKey(1)
         
-        events = pygame.event.get()
-        for event in events:
-            if event.type == QUIT:
-                running = False
-            elif event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
-                    running = False
-        
-        # Pass events to game functions
-        gf.check_events(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets, events)
+            # Handle gestures and events
+            with profiler.phase('gesture'):
+                gesture = gf.check_hand_gesture(hand_landmarks, ai_settings, screen, stats, ship,
+                                                bullets, hand_controller)
         
-        if stats.game_active:
-            ship.update()
-            gf.update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets)
-            gf.update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets)
+            with profiler.phase('events'):
+                events = pygame.event.get()
+                for event in events:
+                    if event.type == QUIT:
+                        running = False
+                    elif event.type == KEYDOWN:
+                        if event.key == K_ESCAPE:
+                            running = False
+                        elif event.key == K_l:
+                            sb.leaderboard.toggle()
+                        elif event.key == K_F3:
+                            sb.profile_overlay.toggle()
             
-            # Update high score
-            if stats.score > stats.high_score:
-                stats.high_score = stats.score
-                if auth.update_high_score(current_player, stats.score):
-                    sb.prep_high_score()
+                # Pass events to game functions
+                gf.check_events(ai_settings, screen, stats, sb, play_button, ship, aliens, bullets, events)
+        
+            # Advance the simulation in fixed steps; the time left over
+            # carries into the next frame.
+            steps = 0
+            for dt in game_clock.steps():
+                steps += 1
+                if not stats.game_active:
+                    continue
+                with profiler.phase('update'):
+                    gf.update_game(ai_settings, screen, stats, sb, ship, aliens, bullets, dt)
+            if recorder:
+                recorder.record_frame(game_clock.frame_ms, steps, gesture, events)
+        
+            # Queue new high scores; check_high_score() has already shown them
+            if stats.high_score > saved_high_score:
+                saved_high_score = stats.high_score
+                score_writer.submit(current_player, stats.high_score)
+        
+            # Don't wait for the interval to save a finished game's score
+            if was_active and not stats.game_active:
+                score_writer.flush()
+            was_active = stats.game_active
         
-        gf.update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button)
+            with profiler.phase('render'):
+                renderer.update_screen(stats, sb, ship, aliens, bullets, play_button,
+                                       game_clock.alpha())
+            profiler.end_frame()
+    finally:
+        # Finish the recording so its last frames aren't lost
+        if recorder:
+            recorder.close()
+            print(f"Recorded {recorder.frames} frames to {recording_path}")
 
-    # Cleanup
-    hand_controller.release()
-    cv2.destroyAllWindows()
-    auth.release_camera()
-    pygame.quit()
+        # Queue a high score set on the last frame, then write everything
+        if stats.high_score > saved_high_score:
+            score_writer.submit(current_player, stats.high_score)
+        score_writer.stop()
+        print(f"High score writes: {score_writer.counters()}")
+        if hand_controller.adaptive:
+            print(f"Hand tracking: {hand_controller.tracking_stats()}")
+        hand_controller.release()
+        cv2.destroyAllWindows()
+        camera.release()
+        pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
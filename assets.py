@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+import pygame
+
+# Shared images by path, with whether each has been converted yet.
+_images = {}
+
+# Shared fonts by (name, size), and rendered text surfaces by everything
+# that went into rendering them, least recently used first.
+_fonts = {}
+_texts = OrderedDict()
+TEXT_CACHE_SIZE = 256
+
+def load_image(path):
+    """Return the shared surface for the image at path.
+
+    The file is only read and decoded the first time it's asked for.
+    Once a display mode has been set, the image is converted to the
+    display's pixel format so blitting it needs no per-blit conversion.
+    Callers share the returned surface and must not draw on it.
+    """
+    image, converted = _images.get(path, (None, False))
+    if image is None:
+        image = pygame.image.load(path)
+    if not converted and pygame.display.get_surface() is not None:
+        if image.get_flags() & pygame.SRCALPHA:
+            image = image.convert_alpha()
+        else:
+            image = image.convert()
+        converted = True
+    _images[path] = (image, converted)
+    return image
+
+def get_font(name, size):
+    """Return the shared system font name at size; None is the default font.
+
+    Looking a font up and loading it is slow, so it's only done once.
+    """
+    font = _fonts.get((name, size))
+    if font is None:
+        font = pygame.font.SysFont(name, size)
+        _fonts[(name, size)] = font
+    return font
+
+def render_text(text, size, color, background=None, font_name=None):
+    """Return a shared antialiased surface of text.
+
+    The most recently used TEXT_CACHE_SIZE renders are kept, so showing
+    the same text again costs a dict lookup. Callers share the returned
+    surface and must not draw on it.
+    """
+    key = (text, font_name, size, tuple(color),
+           tuple(background) if background is not None else None)
+    surface = _texts.get(key)
+    if surface is not None:
+        _texts.move_to_end(key)
+        return surface
+
+    font = get_font(font_name, size)
+    if background is None:
+        surface = font.render(text, True, color)
+    else:
+        surface = font.render(text, True, color, background)
+    _texts[key] = surface
+    if len(_texts) > TEXT_CACHE_SIZE:
+        _texts.popitem(last=False)
+    return surface
+
+def clear():
+    """Forget every loaded image, font and rendered text."""
+    _images.clear()
+    _fonts.clear()
+    _texts.clear()
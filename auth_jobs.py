@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The steps a job goes through, in order
+JOB_STATES = ("capturing", "detecting", "matching", "done")
+
+class AuthJob:
+    """One photo capture and the registration or login it's for"""
+
+    def __init__(self, mode, username, password):
+        """mode is "register", "login" or "identify" (login by face alone)"""
+        self.mode = mode
+        self.username = username
+        self.password = password
+        self.state = "capturing"
+        self.photo = None
+        self.success = False
+        self.message = ""
+
+    @property
+    def done(self):
+        return self.state == "done"
+
+class AuthWorker:
+    """Run auth jobs on a worker pool so the login screen never freezes
+
+    The job's state is updated as it goes, for the UI to show. Only one job
+    runs at a time: submitting while one is running is ignored, which
+    debounces repeated Enter presses and clicks. Between jobs the worker
+    keeps track of the face in the preview, so captures start around it.
+    """
+
+    def __init__(self, auth, max_workers=1, track_interval=1.0):
+        self.auth = auth
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="auth")
+        self.job = None
+        self.track_interval = track_interval
+        self._tracking = None
+        self._next_track = 0.0
+        self._cancel = threading.Event()
+
+    def busy(self):
+        """Return whether a job is still running"""
+        return self.job is not None and not self.job.done
+
+    def submit(self, registration_mode, username, password):
+        """Start a job for the current form; return it, or None if busy"""
+        if self.busy():
+            return None
+        if registration_mode:
+            mode = "register"
+        elif username:
+            mode = "login"
+        else:
+            mode = "identify"
+        self.job = AuthJob(mode, username, password)
+        self.executor.submit(self._run, self.job)
+        return self.job
+
+    def track(self):
+        """Look for the face in the preview if it's been a while and no job is running"""
+        now = time.monotonic()
+        if (self.busy() or now < self._next_track
+                or (self._tracking is not None and not self._tracking.done())):
+            return
+        self._next_track = now + self.track_interval
+        self._tracking = self.executor.submit(self.auth.track_face)
+
+    def poll(self):
+        """Return the job if it has just finished, once; otherwise None"""
+        job = self.job
+        if job is not None and job.done:
+            self.job = None
+            return job
+        return None
+
+    def _run(self, job):
+        """Capture a photo and check it, updating job as it goes"""
+        try:
+            photo = self.auth.capture_photo(
+                progress=lambda state: setattr(job, "state", state),
+                cancelled=self._cancel.is_set)
+            if self._cancel.is_set():
+                job.message = "Cancelled"
+                return
+            if photo is None:
+                job.message = "No face detected, try again!"
+                return
+            job.photo = photo
+
+            job.state = "matching"
+            if job.mode == "register":
+                job.success = self.auth.register_player(job.username, job.password, photo)
+                job.message = "Registration successful!" if job.success else "Username exists or no face detected!"
+            elif job.mode == "login":
+                job.success = self.auth.verify_player(job.username, job.password, photo)
+                job.message = "Login successful!" if job.success else "Invalid credentials or face mismatch!"
+            else:
+                identified = self.auth.identify_player(job.password, photo)
+                job.success = identified is not None
+                if job.success:
+                    job.username = identified
+                job.message = f"Welcome back, {identified}!" if job.success else "Face not recognized or wrong password!"
+        except Exception as e:
+            print(f"Auth job error: {e}")
+            job.message = "Error checking photo, try again!"
+        finally:
+            job.state = "done"
+
+    def shutdown(self):
+        """Drop queued jobs and stop a running one, so quitting doesn't wait
+
+        Interpreter exit still joins the worker, so a capture stops at its
+        next frame and skips the check; a check already under way finishes.
+        """
+        self._cancel.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,7 +1,15 @@
 import cv2
+import numpy as np
 import pygame
 from pygame.locals import *
 
+# Messages for the steps of a running auth job
+PROGRESS_STEPS = (
+    ("capturing", "Capturing photo..."),
+    ("detecting", "Detecting face..."),
+    ("matching", "Matching..."),
+)
+
 class AuthUI:
     def __init__(self):
         pygame.font.init()
@@ -10,6 +18,7 @@ class AuthUI:
         self.active_input = None
         self.message = ""
         self.message_color = (255, 150, 150)  # Softer red with more vibrancy
+        self.progress = None  # Running auth job's state, shown over the message
         self.registration_mode = False
         
         # Modern 3D color scheme with depth
@@ -48,28 +57,66 @@ class AuthUI:
         self.subtitle = "Player Authentication"
         self.camera_preview = None
         self.camera_rect = pygame.Rect(500, 150, 320, 240)  # Camera on right
+        # Preview pixels, resized into by OpenCV and shared with camera_preview
+        self.preview_buffer = None
         
         # Decorative elements with 3D effects
         self.accent_line_height = 6  # Thicker accent line
         self.card_rect = pygame.Rect(50, 80, 420, 480)  # Main content card
         self.card_elevation = 10  # How much the card appears to float
         
+        # Static layers, prebuilt for one screen size and mode
+        self.layers_key = None
+        self.background_layer = None
+        self.active_fields = {}
+        self.camera_placeholder = None
+        self.camera_overlay = None
+        self.corner_surface = None
+        
     def create_auth_ui(self, screen, registration_mode):
-        """Draw the authentication interface with modern 3D styling"""
-        screen.fill(self.bg_color)
-        screen_width, screen_height = screen.get_size()
+        """Draw the authentication interface with modern 3D styling
+
+        Everything static is prebuilt into layers by _build_layers, so a
+        frame only draws the input text, camera preview and message
+        """
+        layers_key = (screen.get_size(), registration_mode)
+        if layers_key != self.layers_key:
+            self._build_layers(screen, registration_mode)
+            self.layers_key = layers_key
+        screen.blit(self.background_layer, (0, 0))
+        
+        # Input fields with modern 3D styling
+        self._draw_input_field(screen, "Username", self.username, 180, 
+                             self.active_input == "username")
+        self._draw_input_field(screen, "Password", "*" * len(self.password), 260, 
+                             self.active_input == "password")
+        
+        # Enhanced camera preview with 3D frame
+        self._draw_camera_preview(screen)
+        
+        # Job progress or message display with icon and animation
+        if self.progress:
+            self._draw_progress(screen)
+        elif self.message:
+            self._draw_message(screen, self.message, self.message_color)
+    
+    def _build_layers(self, screen, registration_mode):
+        """Prerender the static parts of the interface for this size and mode"""
+        background = screen.copy()
+        background.fill(self.bg_color)
+        screen_width, screen_height = background.get_size()
         
         # Draw decorative accent line at top with glow effect
         accent_line = pygame.Surface((screen_width, self.accent_line_height), pygame.SRCALPHA)
         pygame.draw.rect(accent_line, (*self.accent_color, 200), (0, 0, screen_width, self.accent_line_height))
-        screen.blit(accent_line, (0, 0))
+        background.blit(accent_line, (0, 0))
         
         # Draw subtle grid pattern in background
-        self._draw_grid_background(screen)
+        self._draw_grid_background(background)
         
         # Draw card shadow first (for 3D effect)
         shadow_rect = self.card_rect.move(self.shadow_offset, self.shadow_offset)
-        pygame.draw.rect(screen, self.card_shadow, shadow_rect, border_radius=12)
+        pygame.draw.rect(background, self.card_shadow, shadow_rect, border_radius=12)
         
         # Draw content card with 3D bevel effect
         card_surface = pygame.Surface((self.card_rect.width, self.card_rect.height), pygame.SRCALPHA)
@@ -81,7 +128,7 @@ class AuthUI:
         self._draw_bevel(card_surface, (0, 0, self.card_rect.width, self.card_rect.height), 
                         self.bevel_size, border_radius=12)
         
-        screen.blit(card_surface, self.card_rect.topleft)
+        background.blit(card_surface, self.card_rect.topleft)
         
         # Title with two lines and subtle text shadow
         title_surf = self.title_font.render(self.title, True, self.accent_color)
@@ -90,12 +137,12 @@ class AuthUI:
         subtitle_shadow = self.header_font.render(self.subtitle, True, (0, 0, 0, 100))
         
         # Draw shadows first
-        screen.blit(title_shadow, (self.card_rect.x + 32, self.card_rect.y + 32))
-        screen.blit(subtitle_shadow, (self.card_rect.x + 32, self.card_rect.y + 77))
+        background.blit(title_shadow, (self.card_rect.x + 32, self.card_rect.y + 32))
+        background.blit(subtitle_shadow, (self.card_rect.x + 32, self.card_rect.y + 77))
         
         # Then draw main text
-        screen.blit(title_surf, (self.card_rect.x + 30, self.card_rect.y + 30))
-        screen.blit(subtitle_surf, (self.card_rect.x + 30, self.card_rect.y + 75))
+        background.blit(title_surf, (self.card_rect.x + 30, self.card_rect.y + 30))
+        background.blit(subtitle_surf, (self.card_rect.x + 30, self.card_rect.y + 75))
         
         # Mode indicator with icon and glow effect
         mode_text = "REGISTER NEW PLAYER" if registration_mode else "SIGN IN"
@@ -105,36 +152,43 @@ class AuthUI:
         # Create glow effect
         glow = pygame.Surface((mode_surf.get_width() + 20, mode_surf.get_height() + 10), pygame.SRCALPHA)
         pygame.draw.rect(glow, (*self.accent_color, 30), (0, 0, glow.get_width(), glow.get_height()), border_radius=20)
-        screen.blit(glow, (self.card_rect.x + 20, self.card_rect.y + 125))
-        
-        screen.blit(mode_surf, (self.card_rect.x + 30, self.card_rect.y + 130))
-        
-        # Input fields with modern 3D styling
-        self._draw_input_field(screen, "Username", self.username, 180, 
-                             self.active_input == "username", "👤")
-        self._draw_input_field(screen, "Password", "*" * len(self.password), 260, 
-                             self.active_input == "password", "🔒")
+        background.blit(glow, (self.card_rect.x + 20, self.card_rect.y + 125))
+        
+        background.blit(mode_surf, (self.card_rect.x + 30, self.card_rect.y + 130))
+        
+        # Input field backgrounds: inactive on the layer, and the active
+        # look over a copy of the card beneath, to blit when focused
+        self.active_fields = {}
+        for label, y_pos, icon in (("Username", 180, "👤"), ("Password", 260, "🔒")):
+            field_rect = pygame.Rect(self.card_rect.x + 30, y_pos, 360, 50)
+            area = field_rect.union(field_rect.move(2, 3))
+            active_field = background.subsurface(area).copy()
+            self._draw_field_background(active_field, field_rect.move(-area.x, -area.y), 
+                                        True, icon)
+            self.active_fields[label] = (active_field, area)
+            self._draw_field_background(background, field_rect, False, icon)
+            if label == "Username":
+                self.username_rect = field_rect
+            else:
+                self.password_rect = field_rect
         
         # Buttons with 3D styling
         button_x = self.card_rect.x + 30
-        self._draw_button(screen, "Login", button_x, 340, not registration_mode, "→")
-        self._draw_button(screen, "Register", button_x, 400, registration_mode, "+")
-        self._draw_button(screen, "Capture Photo", button_x, 460, False, "📷")
-        
-        # Enhanced camera preview with 3D frame
-        self._draw_camera_preview(screen)
+        self._draw_button(background, "Login", button_x, 340, not registration_mode, "→")
+        self._draw_button(background, "Register", button_x, 400, registration_mode, "+")
+        self._draw_button(background, "Capture Photo", button_x, 460, False, "📷")
         
-        # Message display with icon and animation
-        if self.message:
-            self._draw_message(screen)
+        self._draw_camera_frame(background)
         
         # Subtle watermark with glow
         watermark = self.button_font.render("Alien Invasion v1.0", True, (120, 120, 140))
         watermark_glow = pygame.Surface((watermark.get_width() + 10, watermark.get_height() + 4), pygame.SRCALPHA)
         pygame.draw.rect(watermark_glow, (0, 0, 0, 50), (0, 0, watermark_glow.get_width(), watermark_glow.get_height()), border_radius=4)
-        screen.blit(watermark_glow, (15, screen_height - 34))
-        screen.blit(watermark, (20, screen_height - 30))
-    
+        background.blit(watermark_glow, (15, screen_height - 34))
+        background.blit(watermark, (20, screen_height - 30))
+        
+        self.background_layer = background
+        
     def _draw_grid_background(self, screen):
         """Draw a subtle grid pattern for depth"""
         grid_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
@@ -176,37 +230,42 @@ class AuthUI:
                         border_bottom_right_radius=border_radius)
         surface.blit(shadow, (bevel_rect.x + bevel_rect.width - size, bevel_rect.y))
     
-    def _draw_input_field(self, screen, label, value, y_pos, is_active, icon=None):
-        """Draw modern 3D input fields with icons and hover effect"""
-        field_rect = pygame.Rect(self.card_rect.x + 30, y_pos, 360, 50)
-        
+    def _draw_field_background(self, surface, field_rect, is_active, icon=None):
+        """Draw a modern 3D input field, without its text"""
         # Field shadow for depth
         shadow_rect = field_rect.move(2, 3)
-        pygame.draw.rect(screen, (0, 0, 0, 80), shadow_rect, border_radius=8)
+        pygame.draw.rect(surface, (0, 0, 0, 80), shadow_rect, border_radius=8)
         
         # Field background with hover effect
         color = self.active_input_color if is_active else self.input_color
-        pygame.draw.rect(screen, color, field_rect, border_radius=8)
+        pygame.draw.rect(surface, color, field_rect, border_radius=8)
         
         # Inner bevel effect
         inner_rect = field_rect.inflate(-4, -4)
-        self._draw_bevel(screen, inner_rect, 1, border_radius=4)
+        self._draw_bevel(surface, inner_rect, 1, border_radius=4)
         
         # Left icon if provided
         if icon:
             icon_surf = self.input_font.render(icon, True, (180, 180, 220))
-            screen.blit(icon_surf, (field_rect.x + 15, field_rect.y + 13))
+            surface.blit(icon_surf, (field_rect.x + 15, field_rect.y + 13))
+    
+    def _draw_input_field(self, screen, label, value, y_pos, is_active):
+        """Draw an input field's text and cursor over its prebuilt background"""
+        field_rect = pygame.Rect(self.card_rect.x + 30, y_pos, 360, 50)
+        if is_active:
+            active_field, area = self.active_fields[label]
+            screen.blit(active_field, area)
         
         # Text input
-        text_x = field_rect.x + (50 if icon else 20)
+        text_x = field_rect.x + 50
         text_color = self.text_color if value else (160, 160, 190)
         text_surf = self.input_font.render(value if value else label, True, text_color)
         
         # Text clipping and scrolling for long inputs
-        if text_surf.get_width() > field_rect.width - (70 if icon else 40):
-            offset = max(0, text_surf.get_width() - (field_rect.width - (70 if icon else 40)))
+        if text_surf.get_width() > field_rect.width - 70:
+            offset = max(0, text_surf.get_width() - (field_rect.width - 70))
             screen.blit(text_surf, (text_x, field_rect.y + 13), 
-                       (offset, 0, field_rect.width - (70 if icon else 40), text_surf.get_height()))
+                       (offset, 0, field_rect.width - 70, text_surf.get_height()))
         else:
             screen.blit(text_surf, (text_x, field_rect.y + 13))
         
@@ -214,12 +273,6 @@ class AuthUI:
         if is_active and pygame.time.get_ticks() % 1000 < 500:
             cursor_x = text_x + (text_surf.get_width() if value else 0)
             pygame.draw.rect(screen, self.accent_color, (cursor_x, field_rect.y + 10, 2, 30))
-        
-        # Store reference
-        if label == "Username":
-            self.username_rect = field_rect
-        else:
-            self.password_rect = field_rect
     
     def _draw_button(self, screen, text, x, y, is_active, icon=None):
         """Draw attractive 3D buttons with optional icons"""
@@ -277,11 +330,11 @@ class AuthUI:
         elif text == "Capture Photo":
             self.capture_rect = button_rect
     
-    def _draw_camera_preview(self, screen):
-        """Draw the camera preview with stylish 3D frame"""
+    def _draw_camera_frame(self, surface):
+        """Draw the stylish 3D frame around the camera preview"""
         # Frame shadow for depth
         shadow_rect = self.camera_rect.move(self.shadow_offset, self.shadow_offset)
-        pygame.draw.rect(screen, (0, 0, 0, 150), shadow_rect.inflate(20, 20), border_radius=12)
+        pygame.draw.rect(surface, (0, 0, 0, 150), shadow_rect.inflate(20, 20), border_radius=12)
         
         # Frame background with metallic look
         frame_rect = self.camera_rect.inflate(20, 20)
@@ -293,51 +346,63 @@ class AuthUI:
             pygame.draw.line(frame_surface, (40, 50, 70, alpha), (0, i), (frame_rect.width, i))
         
         pygame.draw.rect(frame_surface, (0, 0, 0, 200), (0, 0, frame_rect.width, frame_rect.height), 2, border_radius=12)
-        screen.blit(frame_surface, frame_rect)
+        surface.blit(frame_surface, frame_rect)
         
         # Inner frame with bevel
         inner_frame = self.camera_rect.inflate(18, 18)
-        pygame.draw.rect(screen, (20, 30, 40), inner_frame, border_radius=10)
-        self._draw_bevel(screen, inner_frame, 3, border_radius=10)
+        pygame.draw.rect(surface, (20, 30, 40), inner_frame, border_radius=10)
+        self._draw_bevel(surface, inner_frame, 3, border_radius=10)
+        
+        # Stylish 3D placeholder, shown until there's a camera frame
+        placeholder = pygame.Surface(self.camera_rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(placeholder, (25, 35, 50), (0, 0, *self.camera_rect.size), border_radius=8)
+        
+        # Add scanline effect
+        for i in range(0, self.camera_rect.height, 2):
+            pygame.draw.line(placeholder, (0, 0, 0, 30), (0, i), (self.camera_rect.width, i))
+        
+        no_cam_icon = self.button_font.render("📷", True, (100, 120, 150))
+        no_cam_text = self.input_font.render("Camera Preview", True, (120, 140, 170))
+        
+        placeholder.blit(no_cam_icon, 
+                       (self.camera_rect.width // 2 - no_cam_icon.get_width() // 2,
+                        self.camera_rect.height // 2 - 30))
+        placeholder.blit(no_cam_text, 
+                       (self.camera_rect.width // 2 - no_cam_text.get_width() // 2,
+                        self.camera_rect.height // 2 + 10))
+        self.camera_placeholder = placeholder
+        
+        # Rounded corners and reflection, laid over each camera frame
+        overlay = pygame.Surface(self.camera_rect.size, pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 255))
+        pygame.draw.rect(overlay, (0, 0, 0, 0), (0, 0, *self.camera_rect.size), border_radius=8)
+        pygame.draw.rect(overlay, (255, 255, 255, 80), 
+                       (0, 0, self.camera_rect.width, self.camera_rect.height//3), 
+                       border_top_left_radius=8, border_top_right_radius=8)
+        self.camera_overlay = overlay
+        
+        # Decorative corner accent with gradient, drawn over the preview
+        corner_size = 20
+        corner_surface = pygame.Surface((corner_size, corner_size), pygame.SRCALPHA)
+        for i in range(corner_size):
+            alpha = 200 - int(150 * (i / corner_size))
+            pygame.draw.line(corner_surface, (*self.accent_color, alpha), (0, i), (corner_size, i))
         
+        pygame.draw.rect(corner_surface, (255, 255, 255, 30), (0, 0, corner_size, corner_size), 1, border_radius=4)
+        self.corner_surface = corner_surface
+    
+    def _draw_camera_preview(self, screen):
+        """Draw the camera preview or placeholder inside its prebuilt frame"""
         # Camera preview or placeholder
         if self.camera_preview:
-            # Apply rounded corners with alpha mask
-            mask = pygame.Surface(self.camera_rect.size, pygame.SRCALPHA)
-            pygame.draw.rect(mask, (255, 255, 255, 255), (0, 0, *self.camera_rect.size), border_radius=8)
-            self.camera_preview.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-            
-            # Add reflection effect
-            reflection = pygame.Surface(self.camera_rect.size, pygame.SRCALPHA)
-            pygame.draw.rect(reflection, (255, 255, 255, 80), 
-                           (0, 0, self.camera_rect.width, self.camera_rect.height//3), 
-                           border_top_left_radius=8, border_top_right_radius=8)
-            self.camera_preview.blit(reflection, (0, 0))
-            
+            # Apply rounded corners and reflection
             screen.blit(self.camera_preview, self.camera_rect)
+            screen.blit(self.camera_overlay, self.camera_rect)
         else:
-            # Stylish 3D placeholder
-            placeholder = pygame.Surface(self.camera_rect.size, pygame.SRCALPHA)
-            pygame.draw.rect(placeholder, (25, 35, 50), (0, 0, *self.camera_rect.size), border_radius=8)
-            
-            # Add scanline effect
-            for i in range(0, self.camera_rect.height, 2):
-                pygame.draw.line(placeholder, (0, 0, 0, 30), (0, i), (self.camera_rect.width, i))
-            
-            no_cam_icon = self.button_font.render("📷", True, (100, 120, 150))
-            no_cam_text = self.input_font.render("Camera Preview", True, (120, 140, 170))
-            
-            placeholder.blit(no_cam_icon, 
-                           (self.camera_rect.width // 2 - no_cam_icon.get_width() // 2,
-                            self.camera_rect.height // 2 - 30))
-            placeholder.blit(no_cam_text, 
-                           (self.camera_rect.width // 2 - no_cam_text.get_width() // 2,
-                            self.camera_rect.height // 2 + 10))
-            
-            screen.blit(placeholder, self.camera_rect)
+            screen.blit(self.camera_placeholder, self.camera_rect)
         
         # Decorative corner accents with 3D effect
-        corner_size = 20
+        corner_size = self.corner_surface.get_width()
         for dx, dy in [(0, 0), (1, 0), (0, 1), (1, 1)]:
             corner_rect = pygame.Rect(
                 self.camera_rect.x - 10 + dx * (self.camera_rect.width + 20 - corner_size),
@@ -347,48 +412,56 @@ class AuthUI:
             
             # Corner shadow
             pygame.draw.rect(screen, (0, 0, 0, 100), corner_rect.move(1, 1), border_radius=4)
-            
-            # Corner with gradient
-            corner_surface = pygame.Surface((corner_size, corner_size), pygame.SRCALPHA)
-            for i in range(corner_size):
-                alpha = 200 - int(150 * (i / corner_size))
-                pygame.draw.line(corner_surface, (*self.accent_color, alpha), (0, i), (corner_size, i))
-            
-            pygame.draw.rect(corner_surface, (255, 255, 255, 30), (0, 0, corner_size, corner_size), 1, border_radius=4)
-            screen.blit(corner_surface, corner_rect)
+            screen.blit(self.corner_surface, corner_rect)
+    
+    def _draw_progress(self, screen):
+        """Draw the running auth job's step, with a dot per step"""
+        states = [state for state, _ in PROGRESS_STEPS]
+        step = states.index(self.progress) if self.progress in states else 0
+        self._draw_message(screen, PROGRESS_STEPS[step][1], (255, 255, 0))
+        
+        for i in range(len(PROGRESS_STEPS)):
+            center = (self.card_rect.right - 70 + i * 20, 537)
+            width = 0 if i <= step else 1
+            pygame.draw.circle(screen, self.accent_color, center, 6, width)
     
-    def _draw_message(self, screen):
+    def _draw_message(self, screen, message, color):
         """Draw animated message box"""
-        msg_icon = "⚠" if "error" in self.message.lower() else "ℹ"
+        msg_icon = "⚠" if "error" in message.lower() else "ℹ"
         
         # Create pulsing effect
         pulse = 1 + 0.1 * abs(pygame.time.get_ticks() % 1000 - 500) / 500
         
         # Background with animation
-        msg_surf = self.input_font.render(f"{msg_icon}  {self.message}", True, self.message_color)
+        msg_surf = self.input_font.render(f"{msg_icon}  {message}", True, color)
         msg_rect = pygame.Rect(self.card_rect.x + 30, 520, msg_surf.get_width() + 20, msg_surf.get_height() + 10)
         
         # Animated background
         msg_bg = pygame.Surface((msg_rect.width, msg_rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(msg_bg, (*self.message_color, 20 * pulse), 
+        pygame.draw.rect(msg_bg, (*color, 20 * pulse), 
                         (0, 0, msg_rect.width, msg_rect.height), 
                         border_radius=6)
-        pygame.draw.rect(msg_bg, (*self.message_color, 80), 
+        pygame.draw.rect(msg_bg, (*color, 80), 
                         (0, 0, msg_rect.width, msg_rect.height), 
                         1, border_radius=6)
         
         screen.blit(msg_bg, msg_rect)
         screen.blit(msg_surf, (msg_rect.x + 10, msg_rect.y + 5))
     
-    def update_camera_preview(self, frame):
-        """Update the camera preview with a new frame"""
+    def update_camera_preview(self, frame, mirror=True):
+        """Update the camera preview with a new frame
+
+        OpenCV resizes the frame straight into a buffer the preview surface
+        wraps and mirrors it there, so no surface or array is allocated
+        per frame
+        """
         if frame is not None:
-            # Convert OpenCV frame to pygame surface
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
-            self.camera_preview = pygame.transform.scale(frame, (self.camera_rect.width, self.camera_rect.height))
-            
-            # Apply rounded corners and reflection
-            mask = pygame.Surface(self.camera_rect.size, pygame.SRCALPHA)
-            pygame.draw.rect(mask, (255, 255, 255, 255), (0, 0, *self.camera_rect.size), border_radius=8)
-            self.camera_preview.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
\ No newline at end of file
+            width, height = self.camera_rect.size
+            if self.preview_buffer is None or self.preview_buffer.shape[:2] != (height, width):
+                self.preview_buffer = np.empty((height, width, 3), dtype=np.uint8)
+                self.camera_preview = pygame.image.frombuffer(
+                    self.preview_buffer, (width, height), 'BGR')
+            cv2.resize(frame, (width, height), dst=self.preview_buffer, 
+                       interpolation=cv2.INTER_AREA)
+            if mirror:
+                cv2.flip(self.preview_buffer, 1, dst=self.preview_buffer)
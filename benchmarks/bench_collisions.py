@@ -0,0 +1,139 @@
+"""Benchmark Fleet.collide_bullets against pygame.sprite.groupcollide.
+
+Bullets are scattered at random over a fleet laid out the way
+create_fleet lays it out. Each case first checks that both methods hit
+exactly the same aliens, then reports the time per call.
+
+    python benchmarks/bench_collisions.py --fleets 36 500 5000 --bullets 3 30 300
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from pygame.sprite import Group, Sprite
+
+from settings import Settings
+from fleet import Fleet
+from bullet import Bullets
+
+def make_fleet(ai_settings, size):
+    """Build a roughly square Fleet of about size aliens, plus matching sprites."""
+    screen = pygame.display.set_mode((ai_settings.screen_width, ai_settings.screen_height))
+    fleet = Fleet(ai_settings, screen)
+    columns = max(1, int(math.sqrt(size * 2)))
+    rows = max(1, size // columns)
+    fleet.add_grid(columns, rows)
+    # Shift by a fraction of a cell so aliens straddle grid lines.
+    fleet.x += 17.4
+    fleet.update(0)
+    fleet.grid_dirty = True
+
+    sprites = []
+    for index, (left, top) in enumerate(zip(fleet.left.tolist(), fleet.y.tolist())):
+        alien = Sprite()
+        alien.rect = pygame.Rect(left, top, fleet.rect.width, fleet.rect.height)
+        alien.index = index
+        sprites.append(alien)
+    return fleet, sprites
+
+def make_bullets(ai_settings, fleet, count, rng):
+    """Return (left, top) positions for count bullets over the fleet's area."""
+    right = int(fleet.left.max()) + fleet.rect.width
+    bottom = int(fleet.y.max()) + fleet.rect.height
+    return [(rng.randrange(-5, right + 5), rng.randrange(-20, bottom + 5))
+            for _ in range(count)]
+
+def bullet_store(ai_settings, screen, positions):
+    """Build a Bullets store holding bullets at the given positions."""
+    bullets = Bullets(ai_settings, screen)
+    for left, top in positions:
+        bullets.add(left, top)
+    return bullets
+
+def bullet_group(ai_settings, positions):
+    """Build a fresh bullet group at the given positions."""
+    bullets = Group()
+    for left, top in positions:
+        bullet = Sprite()
+        bullet.rect = pygame.Rect(left, top, ai_settings.bullet_width,
+                                  ai_settings.bullet_height)
+        bullets.add(bullet)
+    return bullets
+
+def reset_fleet(ai_settings, fleet, sprites, rng):
+    """Bring every alien back to life and move the fleet a little."""
+    fleet.alive[:] = True
+    fleet.count = len(fleet.alive)
+    ai_settings.fleet_direction = rng.choice([1, -1])
+    fleet.update(rng.random() / 10)
+    for alien, left, top in zip(sprites, fleet.left.tolist(), fleet.y.tolist()):
+        alien.rect.topleft = (left, top)
+
+def run_case(ai_settings, fleet_size, bullet_count, repeats, rng):
+    """Check and time both methods for one fleet size and bullet count."""
+    fleet, sprites = make_fleet(ai_settings, fleet_size)
+    fleet_time = group_time = 0.0
+    hits = 0
+
+    for _ in range(repeats):
+        positions = make_bullets(ai_settings, fleet, bullet_count, rng)
+
+        reset_fleet(ai_settings, fleet, sprites, rng)
+        bullets = bullet_store(ai_settings, fleet.screen, positions)
+        start = time.perf_counter()
+        fleet_hits = fleet.collide_bullets(bullets)
+        fleet_time += time.perf_counter() - start
+
+        # groupcollide kills aliens out of every group, so start a fresh one.
+        aliens = Group(sprites)
+        bullets = bullet_group(ai_settings, positions)
+        group_order = bullets.sprites()
+        start = time.perf_counter()
+        group_hits = pygame.sprite.groupcollide(bullets, aliens, True, True)
+        group_time += time.perf_counter() - start
+
+        # Compare hits bullet by bullet.
+        expected = {group_order.index(bullet): [alien.index for alien in hit]
+                    for bullet, hit in group_hits.items()}
+        actual = fleet_hits
+        if expected != actual:
+            raise AssertionError(f"collision results differ for fleet {fleet_size}, "
+                                 f"{bullet_count} bullets")
+        hits += sum(len(hit) for hit in actual.values())
+
+    return len(fleet.alive), fleet_time / repeats, group_time / repeats, hits / repeats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fleets', type=int, nargs='+', default=[36, 500, 5000])
+    parser.add_argument('--bullets', type=int, nargs='+', default=[3, 30, 300])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    ai_settings = Settings()
+    ai_settings.screen_width = ai_settings.screen_height = 8000
+    rng = random.Random(args.seed)
+
+    print(f"{'aliens':>7} {'bullets':>8} {'hits':>6} {'fleet us':>10} "
+          f"{'groupcollide us':>16} {'speedup':>8}")
+    for fleet_size in args.fleets:
+        for bullet_count in args.bullets:
+            aliens, fleet_time, group_time, hits = run_case(
+                ai_settings, fleet_size, bullet_count, args.repeats, rng)
+            print(f"{aliens:>7} {bullet_count:>8} {hits:>6.1f} "
+                  f"{fleet_time * 1e6:>10.1f} {group_time * 1e6:>16.1f} "
+                  f"{group_time / fleet_time:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark face detection for photo capture: full resolution vs FaceDetector.
+
+Times face_recognition's default full-resolution HOG detection, which
+capture used to run on every frame, against FaceDetector on a downscaled
+frame, both cold and tracking the face from the previous frame. Needs
+face_recognition and a photo with a face in it.
+
+    python benchmarks/bench_face_detect.py photo.jpg --repeats 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from face_detect import FaceDetector
+
+def time_ms(func, repeats):
+    """Return the median time of func() in milliseconds, and its last result."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1e3, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('image')
+    parser.add_argument('--width', type=int, default=640,
+                        help="resize the photo to this width, like a camera frame")
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--scale', type=float, default=0.5)
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.image)
+    if frame is None:
+        parser.error(f"can't read {args.image}")
+    height = frame.shape[0] * args.width // frame.shape[1]
+    frame = cv2.resize(frame, (args.width, height), interpolation=cv2.INTER_AREA)
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    full_ms, boxes = time_ms(lambda: face_recognition.face_locations(rgb), args.repeats)
+    print(f"full resolution      {full_ms:8.1f} ms  {boxes[:1]}")
+
+    detector = FaceDetector(scale=args.scale)
+    cold_ms, box = time_ms(lambda: detector.detect(frame, track=False), args.repeats)
+    print(f"downscaled           {cold_ms:8.1f} ms  {box}")
+
+    detector.detect(frame)
+    tracked_ms, box = time_ms(lambda: detector.detect(frame), args.repeats)
+    print(f"downscaled + ROI     {tracked_ms:8.1f} ms  {box}")
+
+    if box is None:
+        return
+    sharp_ms, _ = time_ms(lambda: detector.sharpness(frame, box), args.repeats)
+    print(f"sharpness            {sharp_ms:8.1f} ms")
+    encode_ms, _ = time_ms(lambda: face_recognition.face_encodings(rgb, [box]),
+                           args.repeats)
+    print(f"encode, known box    {encode_ms:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
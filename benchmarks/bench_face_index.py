@@ -0,0 +1,80 @@
+"""Benchmark FaceIndex search latency against the number of enrolled players.
+
+Uses random 128-d encodings, so it needs neither a camera, MongoDB nor
+face_recognition. Also times saving the snapshot and memory-mapping it
+back, which is what a warm start costs.
+
+    python benchmarks/bench_face_index.py --players 1000 10000 50000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from face_index import FaceIndex, ENCODING_SIZE
+
+def build_index(count, rng, snapshot_path):
+    """Return an index of count random players."""
+    index = FaceIndex(snapshot_path)
+    encodings = rng.normal(0, 0.1, (count, ENCODING_SIZE)).astype(np.float32)
+    for number, encoding in enumerate(encodings):
+        index.add(f"player{number}", encoding)
+    return index, encodings
+
+def time_searches(index, queries):
+    """Return the median and 99th percentile search time, in microseconds."""
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1e6
+    return np.median(times), np.percentile(times, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, nargs='+',
+                        default=[1000, 10000, 50000, 100000])
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'players':>8} {'median us':>10} {'p99 us':>9} {'mmap p50':>9} "
+          f"{'save ms':>8} {'load ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.players:
+            snapshot_path = os.path.join(tmp, f"index{count}")
+            index, encodings = build_index(count, rng, snapshot_path)
+
+            # Near-duplicates of enrolled faces, like a returning player.
+            rows = rng.integers(0, count, args.queries)
+            queries = encodings[rows] + rng.normal(0, 0.01, (args.queries, ENCODING_SIZE))
+            median, p99 = time_searches(index, queries.astype(np.float32))
+
+            found = sum(index.search(query)[0] == f"player{row}"
+                        for query, row in zip(queries[:100], rows[:100]))
+            if found != 100:
+                raise AssertionError(f"only {found} of 100 players identified")
+
+            start = time.perf_counter()
+            index.save_snapshot()
+            save_ms = (time.perf_counter() - start) * 1e3
+
+            start = time.perf_counter()
+            warm = FaceIndex(snapshot_path)
+            warm.load_snapshot()
+            load_ms = (time.perf_counter() - start) * 1e3
+            mmap_median, _ = time_searches(warm, queries.astype(np.float32))
+
+            print(f"{count:>8} {median:>10.1f} {p99:>9.1f} {mmap_median:>9.1f} "
+                  f"{save_ms:>8.1f} {load_ms:>8.1f}")
+
+if __name__ == '__main__':
+    main()
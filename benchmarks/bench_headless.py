@@ -0,0 +1,140 @@
+"""Benchmark simulation throughput of the headless game.
+
+Reports simulated steps per second, time per call of the main
+game_functions hot spots, peak traced memory and how much more the game
+loop itself needed, and garbage collections during the run, for several
+fleet sizes and starting levels. Fleet size is scaled by enlarging the screen.
+
+    python benchmarks/bench_headless.py --steps 2000 --scales 1 2 4 --levels 1 5
+"""
+import argparse
+import functools
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from headless import HeadlessGame, sweep_and_fire
+from settings import Settings
+import game_functions as gf
+
+TIMED_FUNCTIONS = ['update_bullets', 'check_bullet_alien_collisions',
+                   'update_aliens', 'check_fleet_edges', 'create_fleet']
+
+def instrument(timings):
+    """Wrap the timed game_functions so every call adds to timings.
+
+    game_functions calls its own helpers through module globals, so the
+    wrappers also see nested calls. Returns a function that unwraps them.
+    """
+    originals = {}
+    for name in TIMED_FUNCTIONS:
+        func = getattr(gf, name)
+        originals[name] = func
+
+        @functools.wraps(func)
+        def timed(*args, _func=func, _name=name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _func(*args, **kwargs)
+            finally:
+                total, calls = timings.get(_name, (0.0, 0))
+                timings[_name] = (total + time.perf_counter() - start, calls + 1)
+        setattr(gf, name, timed)
+
+    def restore():
+        for name, func in originals.items():
+            setattr(gf, name, func)
+    return restore
+
+def make_game(scale, level, render):
+    """Build a headless game with a fleet scaled up by scale in each direction.
+
+    render is None for no drawing, or the render mode to draw with.
+    """
+    ai_settings = Settings()
+    if render:
+        ai_settings.render_mode = render
+    ai_settings.screen_width *= scale
+    ai_settings.screen_height *= scale
+    game = HeadlessGame(ai_settings, sweep_and_fire(), render=bool(render))
+    game.start(level)
+    return game
+
+def run_case(scale, level, steps, render):
+    """Time one configuration and return its results."""
+    # Throughput, without instrumentation overhead.
+    game = make_game(scale, level, render)
+    fleet_size = len(game.aliens)
+    collections = sum(stats['collections'] for stats in gc.get_stats())
+    start = time.perf_counter()
+    game.run(steps)
+    elapsed = time.perf_counter() - start
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections
+
+    # Per-function timings.
+    timings = {}
+    restore = instrument(timings)
+    try:
+        game = make_game(scale, level, render)
+        game.run(steps)
+    finally:
+        restore()
+
+    # Peak memory, and how far the game loop pushed it past setup.
+    tracemalloc.start()
+    try:
+        game = make_game(scale, level, render)
+        setup_current, setup_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        game.run(steps)
+        run_peak = tracemalloc.get_traced_memory()[1]
+        peak = max(setup_peak, run_peak)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'scale': scale,
+        'level': level,
+        'fleet': fleet_size,
+        'steps_per_sec': steps / elapsed,
+        'timings': timings,
+        'peak_kib': peak / 1024,
+        'run_kib': (run_peak - setup_current) / 1024,
+        'collections': collections,
+    }
+
+def print_result(result):
+    """Print one configuration's results."""
+    print(f"scale {result['scale']}  level {result['level']}  "
+          f"fleet {result['fleet']:>5}  "
+          f"{result['steps_per_sec']:>10.0f} steps/s  "
+          f"peak {result['peak_kib']:>8.0f} KiB  "
+          f"loop +{result['run_kib']:>6.1f} KiB  "
+          f"{result['collections']:>5} GCs")
+    for name in TIMED_FUNCTIONS:
+        total, calls = result['timings'].get(name, (0.0, 0))
+        if calls:
+            print(f"    {name:<32} {calls:>7} calls  "
+                  f"{total / calls * 1e6:>9.1f} us/call")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 5])
+    parser.add_argument('--render', choices=['full', 'dirty'],
+                        help="also draw every step to the dummy display in this mode")
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        for level in args.levels:
+            print_result(run_case(scale, level, args.steps, args.render))
+
+if __name__ == '__main__':
+    main()
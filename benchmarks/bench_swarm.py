@@ -0,0 +1,78 @@
+"""Benchmark frame rate against entity count in swarm mode.
+
+Plays swarm-mode games with ever smaller aliens, so ever bigger fleets,
+firing every step, and draws a frame every frame_cap-th of a second of
+simulated time as run_game() would. Reports the aliens and bullets on
+screen and the frames per second the update and render together could
+sustain, to show where the game stops keeping up.
+
+    python benchmarks/bench_swarm.py --widths 20 10 7 5 4 --frames 300
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from headless import HeadlessGame, sweep_and_fire
+from settings import Settings
+
+def run_case(alien_width, frames, render_mode, bullets_allowed):
+    """Time frames of a swarm game with aliens alien_width pixels wide."""
+    ai_settings = Settings()
+    ai_settings.use_swarm_mode(alien_width)
+    ai_settings.bullets_allowed = bullets_allowed
+    ai_settings.render_mode = render_mode
+    game = HeadlessGame(ai_settings, sweep_and_fire(ai_settings.simulation_rate))
+    game.start()
+    aliens = len(game.aliens)
+    steps_per_frame = max(1, ai_settings.simulation_rate // ai_settings.frame_cap)
+
+    # Let the bullets build up before timing.
+    game.run(ai_settings.simulation_rate)
+
+    update_time = render_time = 0.0
+    bullets = 0
+    for _ in range(frames):
+        start = time.perf_counter()
+        for _ in range(steps_per_frame):
+            game.step()
+        drawn = time.perf_counter()
+        game.renderer.update_screen(game.stats, game.sb, game.ship, game.aliens,
+                                    game.bullets, game.play_button, 0.5)
+        done = time.perf_counter()
+        update_time += drawn - start
+        render_time += done - drawn
+        bullets += len(game.bullets)
+
+    return {
+        'aliens': aliens,
+        'bullets': bullets / frames,
+        'update_ms': update_time / frames * 1e3,
+        'render_ms': render_time / frames * 1e3,
+        'fps': frames / (update_time + render_time),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--widths', type=int, nargs='+', default=[20, 10, 7, 5, 4],
+                        help="alien widths in pixels; smaller means more aliens")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--render', choices=['full', 'dirty'], default='dirty')
+    parser.add_argument('--bullets', type=int, default=300,
+                        help="bullets allowed on screen at once")
+    args = parser.parse_args()
+
+    print(f"{'width':>5} {'aliens':>7} {'bullets':>8} {'update ms':>10} "
+          f"{'render ms':>10} {'fps':>7}")
+    for width in args.widths:
+        result = run_case(width, args.frames, args.render, args.bullets)
+        print(f"{width:>5} {result['aliens']:>7} {result['bullets']:>8.0f} "
+              f"{result['update_ms']:>10.2f} {result['render_ms']:>10.2f} "
+              f"{result['fps']:>7.0f}")
+
+if __name__ == '__main__':
+    main()
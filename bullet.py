@@ -1,33 +1,167 @@
+import numpy as np
 import pygame
-from pygame.sprite import Sprite
 
-class Bullet(Sprite):
-    """A class to manage bullets fired from the ship."""
+from pixels import round_pixels
 
-    def __init__(self, ai_settings, screen, ship):
-        """Create a bullet object, at the ship's current position."""
-        super(Bullet, self).__init__()
+# Above this many bullets, draw() reports one rect per screen tile with
+# bullets in it instead of one per bullet, and tiles are this many pixels.
+COALESCE_BULLETS = 32
+TILE_SIZE = 32
+
+class Bullets():
+    """The ship's bullets, stored in preallocated arrays rather than sprites.
+
+    Live bullets fill the first len(self) slots in the order they were
+    fired. Firing writes the next free slot and removing bullets shifts
+    the rest down in place, so the game loop allocates no bullet objects
+    and leaves nothing for the garbage collector.
+    """
+
+    def __init__(self, ai_settings, screen):
+        """Initialize an empty store and the image every bullet is drawn with."""
         self.screen = screen
+        self.ai_settings = ai_settings
 
-        # Create bullet rect at (0, 0), then set correct position.
+        # One rect to position new bullets exactly as a bullet's own rect
+        # would be, and one image every bullet is drawn with.
         self.rect = pygame.Rect(0, 0, ai_settings.bullet_width,
-            ai_settings.bullet_height)
+                                ai_settings.bullet_height)
+        self.image = pygame.Surface(self.rect.size)
+        self.image.fill(ai_settings.bullet_color)
+
+        self.count = 0
+        self._allocate(ai_settings.bullets_allowed)
+
+    def _allocate(self, capacity):
+        """Make room for capacity bullets, keeping those alive."""
+        count = self.count
+        arrays = {}
+        for name, dtype in (('left', np.int64), ('top', np.int64), ('y', float),
+                            ('prev_y', float), ('speed', float)):
+            array = np.zeros(capacity, dtype=dtype)
+            if count:
+                array[:count] = getattr(self, name)[:count]
+            arrays[name] = array
+        # left and top are the pixel position a bullet's rect would hold;
+        # y is its exact vertical position and speed is in pixels per second.
+        self.left = arrays['left']
+        self.top = arrays['top']
+        self.y = arrays['y']
+        self.prev_y = arrays['prev_y']
+        self.speed = arrays['speed']
+        self.capacity = capacity
+
+    def __len__(self):
+        """Return the number of live bullets."""
+        return self.count
+
+    def empty(self):
+        """Remove every bullet."""
+        self.count = 0
+
+    def fire(self, ship):
+        """Fire a bullet from the top of ship if the limit allows one.
+
+        Returns whether a bullet was fired.
+        """
+        if self.count >= self.ai_settings.bullets_allowed:
+            return False
         self.rect.centerx = ship.rect.centerx
         self.rect.top = ship.rect.top
-        
-        # Store a decimal value for the bullet's position.
-        self.y = float(self.rect.y)
-
-        self.color = ai_settings.bullet_color
-        self.speed_factor = ai_settings.bullet_speed_factor
-
-    def update(self):
-        """Move the bullet up the screen."""
-        # Update the decimal position of the bullet.
-        self.y -= self.speed_factor
-        # Update the rect position.
-        self.rect.y = self.y
-
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
+        self.add(self.rect.left, self.rect.top)
+        return True
+
+    def add(self, left, top):
+        """Add a bullet at the given pixel position, moving at the current speed."""
+        if self.count == self.capacity:
+            self._allocate(2 * self.capacity)
+        slot = self.count
+        self.left[slot] = left
+        self.top[slot] = top
+        self.y[slot] = self.prev_y[slot] = top
+        self.speed[slot] = self.ai_settings.bullet_speed_factor
+        self.count += 1
+
+    def update(self, dt):
+        """Move every bullet up the screen over dt seconds."""
+        count = self.count
+        if not count:
+            return
+        y = self.y[:count]
+        self.prev_y[:count] = y
+        y -= self.speed[:count] * dt
+        self.top[:count] = round_pixels(y)
+
+    def remove_offscreen(self):
+        """Remove the bullets that have left the top of the screen."""
+        count = self.count
+        if count:
+            gone = self.top[:count] + self.rect.height <= 0
+            if gone.any():
+                self.remove(np.flatnonzero(gone))
+
+    def remove(self, indices):
+        """Remove the bullets at the given indices, keeping the rest in order."""
+        count = self.count
+        if len(indices) == 1:
+            # The usual case, one bullet hitting: shift the rest down a slot.
+            index = int(indices[0])
+            for array in (self.left, self.top, self.y, self.prev_y, self.speed):
+                array[index:count - 1] = array[index + 1:count]
+            self.count = count - 1
+            return
+        keep = np.ones(count, dtype=bool)
+        keep[indices] = False
+        kept = int(keep.sum())
+        for array in (self.left, self.top, self.y, self.prev_y, self.speed):
+            array[:kept] = array[:count][keep]
+        self.count = kept
+
+    def bounds(self):
+        """Return the live bullets' left, top, right and bottom edges."""
+        count = self.count
+        left = self.left[:count]
+        top = self.top[:count]
+        return left, top, left + self.rect.width, top + self.rect.height
+
+    def draw(self, screen, alpha=1.0):
+        """Draw every bullet, alpha of the way from its last position to its current one.
+
+        Returns the rects drawn, or with many bullets a few rects covering
+        them, so the renderer has fewer areas to erase and push.
+        """
+        count = self.count
+        if not count:
+            return []
+        if alpha < 1.0:
+            prev_y = self.prev_y[:count]
+            top = round_pixels(prev_y + (self.y[:count] - prev_y) * alpha)
+        else:
+            top = self.top[:count]
+        left = self.left[:count]
+        image = self.image
+        blits = [(image, pos) for pos in zip(left.tolist(), top.tolist())]
+        if count <= COALESCE_BULLETS:
+            return screen.blits(blits)
+        screen.blits(blits, doreturn=False)
+        return self._tile_rects(left, top)
+
+    def _tile_rects(self, left, top):
+        """Return one rect per screen tile, covering the bullets that start in it."""
+        # Offset so tiles just off the top or left still get distinct keys.
+        keys = ((top // TILE_SIZE + (1 << 20)) << 21) + (left // TILE_SIZE + (1 << 20))
+        _, tile = np.unique(keys, return_inverse=True)
+        tiles = tile.max() + 1
+        lefts = np.full(tiles, left.max())
+        tops = np.full(tiles, top.max())
+        rights = np.full(tiles, left.min())
+        bottoms = np.full(tiles, top.min())
+        np.minimum.at(lefts, tile, left)
+        np.minimum.at(tops, tile, top)
+        np.maximum.at(rights, tile, left)
+        np.maximum.at(bottoms, tile, top)
+        width, height = self.rect.size
+        return [pygame.Rect(tile_left, tile_top, right - tile_left + width,
+                            bottom - tile_top + height)
+                for tile_left, tile_top, right, bottom in zip(
+                    lefts.tolist(), tops.tolist(), rights.tolist(), bottoms.tolist())]
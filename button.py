@@ -1,4 +1,6 @@
-import pygame.font
+import pygame
+
+import assets
 
 class Button():
 
@@ -11,7 +13,7 @@ class Button():
         self.width, self.height = 200, 50
         self.button_color = (0, 255, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font_size = 48
         
         # Build the button's rect object, and center it.
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -22,8 +24,8 @@ class Button():
 
     def prep_msg(self, msg):
         """Turn msg into a rendered image, and center text on the button."""
-        self.msg_image = self.font.render(msg, True, self.text_color,
-            self.button_color)
+        self.msg_image = assets.render_text(msg, self.font_size,
+            self.text_color, self.button_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
         
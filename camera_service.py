@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+from profiler import profiler
+
+# One captured frame: a sequence number, the capture time and the image.
+CameraFrame = namedtuple('CameraFrame', ['seq', 'timestamp', 'image'])
+
+class CameraService:
+    """The camera device, opened once and shared by every consumer.
+
+    A background thread reads frames into a ring buffer; the login screen,
+    face capture and hand tracking all take frames from it instead of
+    opening the device themselves. Images are shared, not copied, and a
+    buffer is reused once buffer_size newer frames have been captured, so
+    copy any image that is kept for long or drawn on.
+    """
+
+    def __init__(self, indexes=(0, 1, 2), width=640, height=480, buffer_size=8):
+        """Set up the service; the camera is opened by start()."""
+        self.indexes = indexes
+        self.width = width
+        self.height = height
+        self.buffer_size = buffer_size
+        self.cap = None
+
+        self.frames = [None] * buffer_size
+        self.seq = 0
+        self.condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        # Frames captured, and reads that failed.
+        self.captured = 0
+        self.failed = 0
+
+    def open(self):
+        """Open the first camera index that works; return whether one did."""
+        if self.cap is None:
+            for index in self.indexes:
+                cap = cv2.VideoCapture(index)
+                if cap.isOpened():
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+                    self.cap = cap
+                    break
+                cap.release()
+        return self.cap is not None
+
+    def is_opened(self):
+        """Return whether the camera is open."""
+        return self.cap is not None and self.cap.isOpened()
+
+    def start(self):
+        """Open the camera and start capturing, unless already running.
+
+        Returns False if no camera could be opened.
+        """
+        if self._thread is None and self.open():
+            self._running = True
+            self._thread = threading.Thread(target=self._capture_loop,
+                                            name="camera", daemon=True)
+            self._thread.start()
+        return self._thread is not None
+
+    def _capture_loop(self):
+        """Read frames into the ring buffer until stopped."""
+        images = [None] * self.buffer_size
+        while self._running:
+            # Decode straight into the oldest slot's image.
+            slot = (self.seq + 1) % self.buffer_size
+            with profiler.phase('camera.read'):
+                ret, image = self.cap.read(images[slot])
+            timestamp = time.monotonic()
+            if not ret:
+                self.failed += 1
+                time.sleep(0.01)
+                continue
+            images[slot] = image
+
+            with self.condition:
+                self.seq += 1
+                self.frames[slot] = CameraFrame(self.seq, timestamp, image)
+                self.captured += 1
+                self.condition.notify_all()
+
+    def latest(self):
+        """Return the newest frame, or None if there isn't one yet."""
+        with self.condition:
+            return self.frames[self.seq % self.buffer_size]
+
+    def wait_for_frame(self, after=0, timeout=None):
+        """Return the newest frame once its seq is greater than after.
+
+        Returns None if no such frame arrives within timeout seconds, or
+        the camera isn't running.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.seq > after or not self._running, timeout)
+            if self.seq > after:
+                return self.frames[self.seq % self.buffer_size]
+        return None
+
+    def frame_at(self, timestamp):
+        """Return the buffered frame captured closest to timestamp."""
+        with self.condition:
+            frames = [frame for frame in self.frames if frame is not None]
+        return min(frames, key=lambda frame: abs(frame.timestamp - timestamp),
+                   default=None)
+
+    def release(self):
+        """Stop capturing and release the camera."""
+        self._running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self.frames = [None] * self.buffer_size
@@ -0,0 +1,100 @@
+import cv2
+import face_recognition
+
+# Smallest face, in pixels, dlib's HOG detector finds without upsampling
+HOG_FACE_SIZE = 80
+
+class FaceDetector:
+    """Fast face detection for photo capture and login
+
+    HOG detection runs on a downscaled copy of the frame, and only around
+    the face found in the previous frame when there is one. Boxes are
+    scaled back to full resolution, so encodings still see every pixel.
+    Frames where the fast passes find nothing get one full-resolution
+    pass, so faces too small for them are still found, and a face that
+    small is then tracked at full resolution.
+    """
+
+    def __init__(self, scale=0.5, roi_margin=0.5, upsample=0, fallback_upsample=1):
+        """scale is the detection size relative to the frame
+
+        The smallest face found is about 80 / scale pixels at upsample 0,
+        and half that for each extra upsample. fallback_upsample is used
+        for the full-resolution pass, or None to skip it.
+        """
+        self.scale = scale
+        self.roi_margin = roi_margin
+        self.upsample = upsample
+        self.fallback_upsample = fallback_upsample
+        self.roi = None  # Last face box found, (top, right, bottom, left)
+        self.used_fallback = False  # Whether the last detect ran the slow pass
+
+    def detect(self, frame, track=True, fallback=True):
+        """Return the largest face box in a BGR frame, or None
+
+        With track, the search starts around the last face found, at a
+        scale that face can be found at, and the result is remembered for
+        the next frame. Without fallback, the full-resolution pass is
+        skipped even if nothing else finds a face.
+        """
+        height, width = frame.shape[:2]
+        whole = (0, width, height, 0)
+        box = None
+        self.used_fallback = False
+        if track and self.roi is not None:
+            box = self._detect_in(frame, self._expand(self.roi, width, height),
+                                  *self._pass_for(self.roi))
+        if box is None:
+            box = self._detect_in(frame, whole, self.scale, self.upsample)
+        if box is None and fallback and self.fallback_upsample is not None:
+            self.used_fallback = True
+            box = self._detect_in(frame, whole, 1.0, self.fallback_upsample)
+        if track:
+            self.roi = box
+        return box
+
+    def _pass_for(self, box):
+        """Return the cheapest scale and upsample that find a face the size of box"""
+        top, right, bottom, left = box
+        # Leave room for the face to shrink a little between frames
+        size = min(bottom - top, right - left) / 1.25
+        for scale, upsample in ((self.scale, self.upsample), (1.0, 0)):
+            if HOG_FACE_SIZE / scale / 2 ** upsample <= size:
+                return scale, upsample
+        if self.fallback_upsample is None:
+            return self.scale, self.upsample
+        return 1.0, self.fallback_upsample
+
+    def _expand(self, box, width, height):
+        """Grow a box by roi_margin of its size on each side, within the frame"""
+        top, right, bottom, left = box
+        dx = int((right - left) * self.roi_margin)
+        dy = int((bottom - top) * self.roi_margin)
+        return (max(top - dy, 0), min(right + dx, width),
+                min(bottom + dy, height), max(left - dx, 0))
+
+    def _detect_in(self, frame, region, scale, upsample):
+        """Detect faces in a region of frame, resized by scale; return the largest"""
+        top, right, bottom, left = region
+        small = frame[top:bottom, left:right]
+        if scale != 1.0:
+            small = cv2.resize(small, None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_AREA)
+        rgb_small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        boxes = face_recognition.face_locations(
+            rgb_small, number_of_times_to_upsample=upsample)
+        if not boxes:
+            return None
+
+        t, r, b, l = max(boxes, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]))
+        return (top + max(int(t / scale), 0),
+                left + min(int(r / scale), right - left),
+                top + min(int(b / scale), bottom - top),
+                left + max(int(l / scale), 0))
+
+    @staticmethod
+    def sharpness(frame, box):
+        """Return the variance of the Laplacian over the face, higher is sharper"""
+        top, right, bottom, left = box
+        gray = cv2.cvtColor(frame[top:bottom, left:right], cv2.COLOR_BGR2GRAY)
+        return cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -0,0 +1,349 @@
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import numpy as np
+import pygame
+
+import assets
+from pixels import round_pixels
+from spatial_hash import SpatialHash
+
+# Below this many bullet/alien pairs, collide_bullets tests every pair
+# instead of going through the spatial hash. Below SMALL_PAIRS it works
+# bullet by bullet in plain Python, where numpy's per-call overhead would
+# cost more than the tests.
+BRUTE_FORCE_PAIRS = 2048
+SMALL_PAIRS = 1024
+
+# A full grid of aliens ready to copy into a fleet: positions, rows and
+# columns, and the collision grid over them.
+FleetLayout = namedtuple('FleetLayout', ['x', 'y', 'rows', 'cols', 'grid'])
+
+class Fleet():
+    """The alien fleet, stored as arrays rather than one sprite per alien.
+
+    Every alien shares one image. Positions, the alive mask and each
+    alien's row and column live in NumPy arrays, so moving, dropping and
+    edge, bottom and collision checks are single vectorized operations.
+    Full grids are laid out once per size, collision grid included, and
+    a new fleet is copied from its layout into the arrays the last one
+    used.
+    """
+
+    def __init__(self, ai_settings, screen):
+        """Initialize an empty fleet and load the alien image."""
+        self.screen = screen
+        self.ai_settings = ai_settings
+        self.screen_rect = screen.get_rect()
+
+        # Load the alien image; its rect gives every alien's size.
+        image = assets.load_image('images/alien.bmp')
+        if ai_settings.alien_width:
+            width, height = image.get_size()
+            height = max(1, round(height * ai_settings.alien_width / width))
+            image = pygame.transform.smoothscale(image, (ai_settings.alien_width, height))
+        self.image = image
+        self.rect = self.image.get_rect()
+        # How far apart neighbouring aliens are, in pixels.
+        self.step_x = round(ai_settings.alien_spacing * self.rect.width)
+        self.step_y = round(ai_settings.alien_spacing * self.rect.height)
+
+        # Bullet hit tests only look at aliens in the grid cells a bullet
+        # covers. The fleet only ever moves as a whole, so rather than
+        # rebuild the grid every step we track how far the fleet has moved
+        # since it was built and shift bullets the other way.
+        self.cell_size = 2 * max(self.rect.width, self.rect.height,
+                                 ai_settings.bullet_width + 2, ai_settings.bullet_height)
+        self.grid = SpatialHash(self.cell_size)
+        self.grid_dirty = True
+        self.grid_shift_x = 0.0
+        self.grid_shift_y = 0
+
+        # Full grid layouts by (aliens per row, rows).
+        self.layouts = {}
+
+        self._set_aliens(np.empty(0), np.empty(0, dtype=np.int64),
+                         np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    def empty(self):
+        """Remove every alien, keeping the arrays for the next fleet."""
+        self.alive[:] = False
+        self.count = 0
+
+    def _set_aliens(self, x, y, rows, cols):
+        """Replace the fleet with aliens at the given positions."""
+        # x is the exact horizontal position, left the rounded pixel
+        # position a Rect would hold; y only changes in whole pixels.
+        self.x = x.astype(float)
+        self.prev_x = self.x.copy()
+        self.left = round_pixels(self.x)
+        self.y = y.astype(np.int64)
+        # Whether the aliens are in reading order, top to bottom and left
+        # to right along each row, as a grid is laid out. The fleet only
+        # moves as a whole, so that lasts until the aliens are replaced.
+        dy, dx = np.diff(self.y), np.diff(self.left)
+        self.row_major = bool(np.all((dy > 0) | ((dy == 0) & (dx >= 0))))
+        self.rows = rows
+        self.cols = cols
+        self.alive = np.ones(len(self.x), dtype=bool)
+        self.count = len(self.x)
+        self.grid_dirty = True
+
+    def add_grid(self, number_aliens_x, number_rows):
+        """Add a full grid of aliens, alien_spacing widths/heights apart."""
+        layout = self.layout(number_aliens_x, number_rows)
+        if self.count:
+            self._append(layout.x, layout.y, layout.rows, layout.cols)
+        else:
+            self._reset(layout)
+
+    def layout(self, number_aliens_x, number_rows):
+        """Return the FleetLayout of a full grid, laying it out the first time."""
+        layout = self.layouts.get((number_aliens_x, number_rows))
+        if layout is None:
+            rows, cols = np.divmod(np.arange(number_rows * number_aliens_x),
+                                   number_aliens_x)
+            x = (self.rect.width + self.step_x * cols).astype(float)
+            y = self.rect.height + self.step_y * rows
+            grid = SpatialHash(self.cell_size)
+            grid.rebuild(round_pixels(x), y, self.rect.width, self.rect.height)
+            layout = FleetLayout(x, y, rows, cols, grid)
+            self.layouts[(number_aliens_x, number_rows)] = layout
+        return layout
+
+    def _reset(self, layout):
+        """Replace the fleet with layout's aliens, reusing the arrays if they fit."""
+        if len(self.x) != len(layout.x):
+            self._set_aliens(layout.x, layout.y, layout.rows.copy(), layout.cols.copy())
+        else:
+            self.x[:] = layout.x
+            self.y[:] = layout.y
+            self.rows[:] = layout.rows
+            self.cols[:] = layout.cols
+            self.alive[:] = True
+            self.count = len(self.x)
+            self.row_major = True
+        self.prev_x[:] = self.x
+        self.left[:] = round_pixels(self.x)
+
+        # The layout's collision grid is already built at these positions.
+        self.grid.share(layout.grid)
+        self.grid_dirty = False
+        self.grid_shift_x = 0.0
+        self.grid_shift_y = 0
+
+    def add_alien(self, alien_number, row_number):
+        """Add one alien at the given column and row."""
+        self.add_grid_cells(np.array([alien_number]), np.array([row_number]))
+
+    def add_grid_cells(self, cols, rows):
+        """Add aliens at the given grid columns and rows."""
+        x = self.rect.width + self.step_x * cols
+        y = self.rect.height + self.step_y * rows
+        self._append(x, y, rows, cols)
+
+    def _append(self, x, y, rows, cols):
+        """Add aliens to those already alive."""
+        alive = self.alive
+        self._set_aliens(np.concatenate([self.x[alive], x]),
+                         np.concatenate([self.y[alive], y]),
+                         np.concatenate([self.rows[alive], rows]),
+                         np.concatenate([self.cols[alive], cols]))
+
+    def __len__(self):
+        """Return the number of aliens still alive."""
+        return self.count
+
+    def update(self, dt):
+        """Move the whole fleet right or left over dt seconds."""
+        self.prev_x[:] = self.x
+        self.x += (self.ai_settings.alien_speed_factor *
+                   self.ai_settings.fleet_direction * dt)
+        self.left[:] = round_pixels(self.x)
+        self.grid_shift_x += (self.ai_settings.alien_speed_factor *
+                              self.ai_settings.fleet_direction * dt)
+
+    def drop(self, distance):
+        """Move the whole fleet down by distance pixels."""
+        self.y += distance
+        self.grid_shift_y += distance
+
+    def check_edges(self):
+        """Return True if any alien is at an edge of the screen."""
+        left = self.left[self.alive]
+        return bool(np.any(left + self.rect.width >= self.screen_rect.right) or
+                    np.any(left <= 0))
+
+    def check_bottom(self, bottom):
+        """Return True if any alien has reached bottom."""
+        return bool(np.any(self.y[self.alive] + self.rect.height >= bottom))
+
+    def collide_rect(self, rect):
+        """Return True if any alien overlaps rect."""
+        return bool(np.any(self._overlaps(rect)))
+
+    def _overlaps(self, rect):
+        """Return a mask of live aliens overlapping rect, like Rect.colliderect."""
+        return (self.alive &
+                (self.left < rect.right) & (rect.left < self.left + self.rect.width) &
+                (self.y < rect.bottom) & (rect.top < self.y + self.rect.height))
+
+    def update_grid(self):
+        """Rebuild the collision grid if aliens have been added or replaced."""
+        if self.grid_dirty:
+            self.grid.rebuild(self.left, self.y, self.rect.width, self.rect.height)
+            self.grid_dirty = False
+            self.grid_shift_x = 0.0
+            self.grid_shift_y = 0
+
+    def _bullet_hits(self, left, top, right, bottom):
+        """Return (bullet, alien) index pairs for live aliens each bullet overlaps."""
+        if len(left) * self.count <= BRUTE_FORCE_PAIRS:
+            # Few enough pairs that testing them all beats the grid lookup.
+            live = np.flatnonzero(self.alive)
+            alien_left, alien_top = self.left[live], self.y[live]
+            hit = ((alien_left < right[:, None]) &
+                   (left[:, None] < alien_left + self.rect.width) &
+                   (alien_top < bottom[:, None]) &
+                   (top[:, None] < alien_top + self.rect.height))
+            bullets, aliens = np.nonzero(hit)
+            return bullets, live[aliens]
+
+        self.update_grid()
+        # Every alien has moved by grid_shift_x give or take a pixel of
+        # rounding, so widen the shifted bullets by a pixel each side.
+        shift_x = int(round_pixels(np.array([self.grid_shift_x]))[0])
+        shift_y = self.grid_shift_y
+        bullets, aliens = self.grid.query(left - shift_x - 1, top - shift_y,
+                                          right - shift_x + 1, bottom - shift_y)
+
+        # Exact Rect.colliderect test against the current positions.
+        live = self.alive[aliens]
+        bullets, aliens = bullets[live], aliens[live]
+        alien_left, alien_top = self.left[aliens], self.y[aliens]
+        hit = ((alien_left < right[bullets]) &
+               (left[bullets] < alien_left + self.rect.width) &
+               (alien_top < bottom[bullets]) &
+               (top[bullets] < alien_top + self.rect.height))
+        return bullets[hit], aliens[hit]
+
+    def collide_bullets(self, bullets):
+        """Remove every bullet that hits an alien, and kill the aliens it hits.
+
+        Bullets are checked in the order they were fired, so an alien
+        killed by one bullet can't be hit by a later one. Like
+        groupcollide(), this returns a dict mapping each hitting bullet
+        (as its index in bullets before the removal) to the aliens it hit
+        (as fleet indices).
+        """
+        collisions = {}
+        if not self.count or not len(bullets):
+            return collisions
+        if len(bullets) * len(self.alive) <= SMALL_PAIRS:
+            return self._collide_few(bullets)
+        hit_bullets, hit_aliens = self._bullet_hits(*bullets.bounds())
+        if not len(hit_aliens):
+            return collisions
+
+        # An alien overlapped by several bullets goes to the first of them,
+        # exactly as if the bullets had been checked one at a time.
+        order = np.lexsort((hit_bullets, hit_aliens))
+        hit_bullets, hit_aliens = hit_bullets[order], hit_aliens[order]
+        first = np.ones(len(hit_aliens), dtype=bool)
+        first[1:] = hit_aliens[1:] != hit_aliens[:-1]
+        hit_bullets, hit_aliens = hit_bullets[first], hit_aliens[first]
+
+        self.alive[hit_aliens] = False
+        self.count -= len(hit_aliens)
+
+        # Group the aliens by bullet, in bullet order.
+        order = np.lexsort((hit_aliens, hit_bullets))
+        hit_bullets, hit_aliens = hit_bullets[order], hit_aliens[order]
+        starts = np.flatnonzero(np.diff(hit_bullets, prepend=-1))
+        for bullet_index, aliens_hit in zip(hit_bullets[starts].tolist(),
+                                            np.split(hit_aliens, starts[1:])):
+            collisions[bullet_index] = aliens_hit.tolist()
+        bullets.remove(hit_bullets[starts])
+        return collisions
+
+    def _collide_few(self, bullets):
+        """collide_bullets() for a default-sized fleet, one bullet at a time.
+
+        In a row-major fleet the aliens a bullet overlaps are found by
+        binary search, first for the rows and then along the row.
+        """
+        width, height = self.rect.size
+        bullet_width, bullet_height = bullets.rect.size
+        tops = self.y.tolist()
+        if self.row_major:
+            fleet_top, fleet_bottom = tops[0], tops[-1] + height
+        else:
+            fleet_top, fleet_bottom = min(tops), max(tops) + height
+        bullet_tops = bullets.top.tolist()
+        lefts = None
+        collisions = {}
+        for bullet_index in range(len(bullets)):
+            top = bullet_tops[bullet_index]
+            bottom = top + bullet_height
+            if bottom <= fleet_top or top >= fleet_bottom:
+                # Above or below the fleet, as most bullets are.
+                continue
+            if lefts is None:
+                lefts = self.left.tolist()
+                bullet_lefts = bullets.left.tolist()
+            left = bullet_lefts[bullet_index]
+            right = left + bullet_width
+            if not self.row_major:
+                hit = [index for index, (alien_left, alien_top) in enumerate(zip(lefts, tops))
+                       if alien_top < bottom and top < alien_top + height
+                       and alien_left < right and left < alien_left + width]
+            else:
+                start = bisect_right(tops, top - height)
+                stop = bisect_left(tops, bottom)
+                if start < stop and tops[start] == tops[stop - 1]:
+                    # One row, in order along it.
+                    start = bisect_right(lefts, left - width, start, stop)
+                    stop = bisect_left(lefts, right, start, stop)
+                    hit = range(start, stop)
+                else:
+                    hit = [index for index in range(start, stop)
+                           if lefts[index] < right and left < lefts[index] + width]
+            # Dead aliens, perhaps killed by an earlier bullet, can't be hit.
+            hit = [index for index in hit if self.alive[index]]
+            if hit:
+                collisions[bullet_index] = hit
+                self.alive[hit] = False
+                self.count -= len(hit)
+        if collisions:
+            bullets.remove(list(collisions))
+        return collisions
+
+    def draw(self, screen, alpha=1.0):
+        """Draw every live alien, alpha of the way along its last move.
+
+        Returns a rect for each row covering the aliens drawn in it.
+        """
+        if alpha < 1.0:
+            x = self.prev_x + (self.x - self.prev_x) * alpha
+            left = round_pixels(x)[self.alive]
+        else:
+            left = self.left[self.alive]
+        top = self.y[self.alive]
+        image = self.image
+        screen.blits([(image, pos) for pos in zip(left.tolist(), top.tolist())],
+                     doreturn=False)
+        return self._row_rects(left, top)
+
+    def _row_rects(self, left, top):
+        """Return one rect per row of aliens, spanning the row's drawn aliens."""
+        if not len(left):
+            return []
+        tops, row = np.unique(top, return_inverse=True)
+        lefts = np.full(len(tops), left.max())
+        rights = np.full(len(tops), left.min())
+        np.minimum.at(lefts, row, left)
+        np.maximum.at(rights, row, left)
+        widths = rights - lefts + self.rect.width
+        return [pygame.Rect(row_left, row_top, width, self.rect.height)
+                for row_left, row_top, width in zip(lefts.tolist(), tops.tolist(),
+                                                    widths.tolist())]
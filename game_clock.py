@@ -0,0 +1,46 @@
+import pygame
+
+class GameClock():
+    """Run the simulation at a fixed timestep, independent of frame rate."""
+
+    def __init__(self, ai_settings):
+        """Initialize the clock from the game's timing settings."""
+        self.ai_settings = ai_settings
+        self.clock = pygame.time.Clock()
+        self.time_step = 1.0 / ai_settings.simulation_rate
+
+        # Never simulate more than this much time in one frame, so a long
+        # stall doesn't turn into a burst of catch-up steps.
+        self.max_frame_time = self.time_step * ai_settings.max_steps_per_frame
+        self.accumulator = 0.0
+        # Milliseconds the last frame took, as measured by tick().
+        self.frame_ms = 0
+
+    def tick(self, active=True):
+        """Wait out the frame cap and bank the elapsed time.
+
+        The idle cap is used while no game is running, so the Play screen
+        doesn't spin the CPU.
+        """
+        if active:
+            frame_cap = self.ai_settings.frame_cap
+        else:
+            frame_cap = self.ai_settings.idle_frame_cap
+        self.frame_ms = self.clock.tick(frame_cap)
+        self.accumulator += min(self.frame_ms / 1000.0, self.max_frame_time)
+
+    def steps(self):
+        """Yield one fixed time step for each step that is due."""
+        while self.accumulator >= self.time_step:
+            self.accumulator -= self.time_step
+            yield self.time_step
+
+    def alpha(self):
+        """Return how far we are between the last step and the next one."""
+        if not self.ai_settings.interpolate:
+            return 1.0
+        return self.accumulator / self.time_step
+
+    def get_fps(self):
+        """Return the measured frame rate."""
+        return self.clock.get_fps()
@@ -1,16 +1,23 @@
 import sys
-from time import sleep
 import pygame
-import cv2
 
-from bullet import Bullet
-from alien import Alien
+import assets
+from profiler import profiler
+from game_stats import PLAYING, RESPAWNING, LEVEL_TRANSITION, GAME_OVER
 
-def check_hand_gesture(hand_landmarks, ai_settings, screen, ship, bullets, hand_controller):
-    """Control ship and fire bullets using hand landmarks with visual feedback."""
+# Gesture feedback to draw on top of the next frame, as (image, position).
+pending_feedback = []
+
+def check_hand_gesture(hand_landmarks, ai_settings, screen, stats, ship, bullets,
+                       hand_controller):
+    """Control ship and fire bullets using hand landmarks with visual feedback.
+
+    Returns the (moving_left, moving_right, fire) gesture applied, or None
+    if no hand was seen.
+    """
     if not hand_landmarks:
         hand_controller.current_gesture = None
-        return
+        return None
 
     wrist = hand_landmarks.landmark[0]
     index_tip = hand_landmarks.landmark[8]
@@ -31,24 +38,34 @@ def check_hand_gesture(hand_landmarks, ai_settings, screen, ship, bullets, hand_
         hand_controller.current_gesture = "NEUTRAL"
 
     # Enhanced fire detection using both index and middle fingers
-    if index_tip.y < wrist.y - 0.15 and middle_tip.y < wrist.y - 0.15:
-        fire_bullet(ai_settings, screen, ship, bullets)
+    fire = index_tip.y < wrist.y - 0.15 and middle_tip.y < wrist.y - 0.15
+    if fire and stats.state == PLAYING:
+        fire_bullet(ai_settings, screen, stats, ship, bullets)
         hand_controller.current_gesture = "FIRING!"
         show_gesture_feedback(screen, "FIRING!", (255, 0, 0))
+    return ship.moving_left, ship.moving_right, fire
+
+def apply_hand_gesture(gesture, ai_settings, screen, stats, ship, bullets):
+    """Apply a gesture returned by check_hand_gesture(), as when replaying."""
+    if gesture is None:
+        return
+    ship.moving_left, ship.moving_right, fire = gesture
+    if fire and stats.state == PLAYING:
+        fire_bullet(ai_settings, screen, stats, ship, bullets)
+        show_gesture_feedback(screen, "FIRING!", (255, 0, 0))
 
 def show_gesture_feedback(screen, text, color):
-    """Show gesture feedback on the game screen."""
-    font = pygame.font.SysFont(None, 36)
-    text_surface = font.render(text, True, color)
-    screen.blit(text_surface, (10, 10))
+    """Show gesture feedback on the next frame drawn."""
+    text_surface = assets.render_text(text, 36, color)
+    pending_feedback.append((text_surface, (10, 10)))
 
-def check_keydown_events(event, ai_settings, screen, ship, bullets):
+def check_keydown_events(event, ai_settings, screen, stats, ship, bullets):
     if event.key == pygame.K_RIGHT:
         ship.moving_right = True
     elif event.key == pygame.K_LEFT:
         ship.moving_left = True
     elif event.key == pygame.K_SPACE:
-        fire_bullet(ai_settings, screen, ship, bullets)
+        fire_bullet(ai_settings, screen, stats, ship, bullets)
     elif event.key == pygame.K_q:
         sys.exit()
 
@@ -67,11 +84,11 @@ def check_events(ai_settings, screen, stats, sb, play_button, ship, aliens, bull
         if event.type == pygame.QUIT:
             sys.exit()
         elif event.type == pygame.KEYDOWN:
-            check_keydown_events(event, ai_settings, screen, ship, bullets)
+            check_keydown_events(event, ai_settings, screen, stats, ship, bullets)
         elif event.type == pygame.KEYUP:
             check_keyup_events(event, ship)
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
+            mouse_x, mouse_y = event.pos
             check_play_button(ai_settings, screen, stats, sb, play_button,
                             ship, aliens, bullets, mouse_x, mouse_y)
 
@@ -99,43 +116,57 @@ def check_play_button(ai_settings, screen, stats, sb, play_button, ship,
         create_fleet(ai_settings, screen, ship, aliens)
         ship.center_ship()
 
-def fire_bullet(ai_settings, screen, ship, bullets):
-    """Fire a bullet if limit not reached yet."""
-    if len(bullets) < ai_settings.bullets_allowed:
-        new_bullet = Bullet(ai_settings, screen, ship)
-        bullets.add(new_bullet)
+def fire_bullet(ai_settings, screen, stats, ship, bullets):
+    """Fire a bullet if limit not reached yet and the game isn't paused."""
+    # Bullets don't move during a transition, so they'd pile up at the
+    # ship and all launch at once when play resumed.
+    if stats.state == PLAYING:
+        bullets.fire(ship)
+
+def update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button,
+                  alpha=1.0):
+    """Update images on the screen and flip to the new screen.
 
-def update_screen(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button):
-    """Update images on the screen and flip to the new screen."""
+    alpha is how far the frame falls between the last two simulation
+    steps; moving objects are drawn that far along their path.
+    """
     screen.fill(ai_settings.bg_color)
-    
-    # Redraw all game elements
-    for bullet in bullets.sprites():
-        bullet.draw_bullet()
-    ship.blitme()
-    aliens.draw(screen)
+    draw_game(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button, alpha)
+    pygame.display.flip()
+
+def draw_game(ai_settings, screen, stats, sb, ship, aliens, bullets, play_button,
+              alpha=1.0):
+    """Draw every game element, and return the rects of those that move.
+
+    The scoreboard and Play button are drawn but not included; the
+    pending gesture feedback is drawn, included and cleared.
+    """
+    rects = bullets.draw(screen, alpha)
+    rects.append(ship.blitme(alpha))
+    rects.extend(aliens.draw(screen, alpha))
     sb.show_score()
     
     # Draw play button if game is inactive
     if not stats.game_active:
         play_button.draw_button()
     
-    pygame.display.flip()
+    for image, position in pending_feedback:
+        rects.append(screen.blit(image, position))
+    del pending_feedback[:]
+    return rects
 
-def update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets):
-    """Update position of bullets and get rid of old bullets."""
-    bullets.update()
+def update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets, dt):
+    """Advance bullets by dt seconds and get rid of old bullets."""
+    bullets.update(dt)
     
     # Remove disappeared bullets
-    for bullet in bullets.copy():
-        if bullet.rect.bottom <= 0:
-            bullets.remove(bullet)
+    bullets.remove_offscreen()
     
     check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens, bullets)
 
 def check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens, bullets):
     """Respond to bullet-alien collisions."""
-    collisions = pygame.sprite.groupcollide(bullets, aliens, True, True)
+    collisions = aliens.collide_bullets(bullets)
     
     if collisions:
         for aliens_hit in collisions.values():
@@ -150,6 +181,7 @@ def check_bullet_alien_collisions(ai_settings, screen, stats, sb, ship, aliens,
         stats.level += 1
         sb.prep_level()
         create_fleet(ai_settings, screen, ship, aliens)
+        start_transition(stats, LEVEL_TRANSITION, ai_settings.level_pause)
 
 def check_high_score(stats, sb):
     """Check to see if there's a new high score."""
@@ -159,15 +191,12 @@ def check_high_score(stats, sb):
 
 def check_fleet_edges(ai_settings, aliens):
     """Respond appropriately if any aliens have reached an edge."""
-    for alien in aliens.sprites():
-        if alien.check_edges():
-            change_fleet_direction(ai_settings, aliens)
-            break
+    if aliens.check_edges():
+        change_fleet_direction(ai_settings, aliens)
 
 def change_fleet_direction(ai_settings, aliens):
     """Drop the entire fleet and change the fleet's direction."""
-    for alien in aliens.sprites():
-        alien.rect.y += ai_settings.fleet_drop_speed
+    aliens.drop(ai_settings.fleet_drop_speed)
     ai_settings.fleet_direction *= -1
 
 def ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets):
@@ -175,32 +204,70 @@ def ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets):
     if stats.ships_left > 0:
         stats.ships_left -= 1
         sb.prep_ships()
+        state = RESPAWNING
     else:
-        stats.game_active = False
-        pygame.mouse.set_visible(True)
+        state = GAME_OVER
     
     # Reset game elements
     aliens.empty()
     bullets.empty()
     create_fleet(ai_settings, screen, ship, aliens)
     ship.center_ship()
-    sleep(0.5)
+    start_transition(stats, state, ai_settings.ship_hit_pause)
+
+def start_transition(stats, state, duration):
+    """Hold the game in state for duration seconds of simulated time."""
+    stats.state = state
+    stats.state_time_left = duration
+    if duration <= 0:
+        end_transition(stats)
+
+def update_transition(stats, dt):
+    """Count the current transition down by dt seconds, ending it when it runs out."""
+    stats.state_time_left -= dt
+    # Allow for rounding in the sum of the steps.
+    if stats.state_time_left < 1e-9:
+        end_transition(stats)
+
+def end_transition(stats):
+    """Finish the current transition: play on, or show the Play button."""
+    if stats.state == GAME_OVER:
+        stats.game_active = False
+        pygame.mouse.set_visible(True)
+    stats.state = PLAYING
+    stats.state_time_left = 0.0
 
 def check_aliens_bottom(ai_settings, screen, stats, sb, ship, aliens, bullets):
     """Check if any aliens have reached the bottom of the screen."""
     screen_rect = screen.get_rect()
-    for alien in aliens.sprites():
-        if alien.rect.bottom >= screen_rect.bottom:
-            ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets)
-            break
+    if aliens.check_bottom(screen_rect.bottom):
+        ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets)
+
+def update_game(ai_settings, screen, stats, sb, ship, aliens, bullets, dt):
+    """Advance the ship, bullets and fleet by one simulation step of dt seconds.
+
+    During a transition the step only counts down the transition, so the
+    game stands still while frames keep coming.
+    """
+    if stats.state != PLAYING:
+        update_transition(stats, dt)
+        return
+    ship.update(dt)
+    with profiler.phase('update_bullets'):
+        update_bullets(ai_settings, screen, stats, sb, ship, aliens, bullets, dt)
+    if stats.state != PLAYING:
+        # The fleet was just cleared; the next level waits its turn.
+        return
+    with profiler.phase('update_aliens'):
+        update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets, dt)
 
-def update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets):
-    """Update positions of all aliens in the fleet."""
+def update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets, dt):
+    """Advance all aliens in the fleet by dt seconds."""
     check_fleet_edges(ai_settings, aliens)
-    aliens.update()
+    aliens.update(dt)
     
     # Check for collisions
-    if pygame.sprite.spritecollideany(ship, aliens):
+    if aliens.collide_rect(ship.rect):
         ship_hit(ai_settings, screen, stats, sb, ship, aliens, bullets)
     
     check_aliens_bottom(ai_settings, screen, stats, sb, ship, aliens, bullets)
@@ -208,28 +275,20 @@ def update_aliens(ai_settings, screen, stats, sb, ship, aliens, bullets):
 def get_number_aliens_x(ai_settings, alien_width):
     """Determine the number of aliens that fit in a row."""
     available_space_x = ai_settings.screen_width - 2 * alien_width
-    return int(available_space_x / (2 * alien_width))
+    return int(available_space_x / round(ai_settings.alien_spacing * alien_width))
 
 def get_number_rows(ai_settings, ship_height, alien_height):
     """Determine the number of rows of aliens that fit on the screen."""
-    available_space_y = (ai_settings.screen_height - (3 * alien_height) - ship_height)
-    return int(available_space_y / (2 * alien_height))
+    available_space_y = ((ai_settings.screen_height - (3 * alien_height) - ship_height) *
+                         ai_settings.fleet_height)
+    return int(available_space_y / round(ai_settings.alien_spacing * alien_height))
 
 def create_alien(ai_settings, screen, aliens, alien_number, row_number):
     """Create an alien and place it in the row."""
-    alien = Alien(ai_settings, screen)
-    alien_width = alien.rect.width
-    alien.x = alien_width + 2 * alien_width * alien_number
-    alien.rect.x = alien.x
-    alien.rect.y = alien.rect.height + 2 * alien.rect.height * row_number
-    aliens.add(alien)
+    aliens.add_alien(alien_number, row_number)
 
 def create_fleet(ai_settings, screen, ship, aliens):
     """Create a full fleet of aliens."""
-    alien = Alien(ai_settings, screen)
-    number_aliens_x = get_number_aliens_x(ai_settings, alien.rect.width)
-    number_rows = get_number_rows(ai_settings, ship.rect.height, alien.rect.height)
-    
-    for row_number in range(number_rows):
-        for alien_number in range(number_aliens_x):
-            create_alien(ai_settings, screen, aliens, alien_number, row_number)
\ No newline at end of file
+    number_aliens_x = get_number_aliens_x(ai_settings, aliens.rect.width)
+    number_rows = get_number_rows(ai_settings, ship.rect.height, aliens.rect.height)
+    aliens.add_grid(number_aliens_x, number_rows)
\ No newline at end of file
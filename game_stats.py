@@ -1,3 +1,10 @@
+# What the game is doing while active. Everything but PLAYING is a timed
+# transition that holds the simulation still until it runs out.
+PLAYING = 'playing'
+RESPAWNING = 'respawning'
+LEVEL_TRANSITION = 'level-transition'
+GAME_OVER = 'game-over'
+
 class GameStats():
     """Track statistics for Alien Invasion."""
     
@@ -17,3 +24,6 @@ class GameStats():
         self.ships_left = self.ai_settings.ship_limit
         self.score = 0
         self.level = 1
+        self.state = PLAYING
+        # Seconds of simulated time left in the current transition.
+        self.state_time_left = 0.0
@@ -1,36 +1,305 @@
+import threading
+import time
+from collections import deque, namedtuple
+
 import cv2
 import mediapipe as mp
 
-class HandController:
+from camera_service import CameraService
+from profiler import profiler
+
+# One processed camera frame: a sequence number, the capture time of the
+# frame the landmarks were inferred from, the detected landmarks (or None)
+# and the annotated frame.
+HandResult = namedtuple('HandResult', ['seq', 'timestamp', 'landmarks', 'frame'])
+
+# Adaptive tracking's quality levels, best first: the MediaPipe model
+# complexity and the scale frames are resized by before inference.
+QUALITY_LEVELS = [(1, 1.0), (0, 1.0), (0, 0.75), (0, 0.5)]
+
+class LatestValue:
+    """A single-slot mailbox that only ever holds the newest value.
+
+    The writer replaces the slot and readers take whatever is in it.
+    Rebinding an attribute is atomic, so neither side needs a lock and a
+    slow reader never holds up the writer.
+    """
+
     def __init__(self):
+        self._value = None
+
+    def publish(self, value):
+        """Replace the current value."""
+        self._value = value
+
+    def peek(self):
+        """Return the current value without consuming it."""
+        return self._value
+
+class HandController:
+    def __init__(self, camera=None, threaded=True, max_result_age=0.5,
+                 adaptive=False, frame_budget=0.025, motion_threshold=2.0,
+                 max_skipped=3):
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self.hands = self._make_hands(model_complexity=1)
+        self.mp_drawing = mp.solutions.drawing_utils
+        self.current_gesture = None
+        # Frames come from a shared CameraService; one is opened if not given.
+        self.owns_camera = camera is None
+        self.camera = CameraService() if camera is None else camera
+        self.camera.start()
+
+        # Results older than this (seconds) are treated as "no hand".
+        self.max_result_age = max_result_age
+        # Age in seconds of the result last handed to the game loop.
+        self.result_age = None
+
+        # Adaptive tracking: inference is cropped to the hand, skipped while
+        # the mean pixel change is under motion_threshold (for at most
+        # max_skipped frames in a row), and the quality level is lowered
+        # when inference takes longer than frame_budget seconds.
+        self.adaptive = adaptive
+        self.frame_budget = frame_budget
+        self.motion_threshold = motion_threshold
+        self.max_skipped = max_skipped
+        self.level = 0
+        self.roi = None  # (left, top, right, bottom) in pixels, or None
+        self._reference = None  # Thumbnail of the last inferred frame
+        self._last_landmarks = None
+        self._inferred_at = None  # Timestamp of the frame they came from
+        self._skipped = 0
+        self._average_time = None
+        self._since_change = 0
+        # Inferences to wait before trying a better level; doubled each
+        # time a better level turns out to be over budget.
+        self._upgrade_wait = 60
+        self._upgraded = False
+        # (finish time, seconds) of recent inferences, and frames skipped.
+        self.inferences = deque(maxlen=120)
+        self.frames_skipped = 0
+
+        self.results = LatestValue()
+        self._last_seq = 0
+        self._running = False
+        self._thread = None
+        if threaded:
+            self.start()
+
+    def _make_hands(self, model_complexity):
+        """Create a MediaPipe Hands tracker."""
+        return self.mp_hands.Hands(
             static_image_mode=False,
             max_num_hands=1,
+            model_complexity=model_complexity,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.current_gesture = None
-        self.cap = cv2.VideoCapture(0)  # Open default camera
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
 
-    def get_hand_landmarks(self):
-        """Processes a frame and returns hand landmarks if detected."""
-        ret, frame = self.cap.read()
-        if not ret:
-            return None, None
-            
+    def start(self):
+        """Start capturing and running inference on a background thread."""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._capture_loop,
+                                            name="hand-capture", daemon=True)
+            self._thread.start()
+
+    def _capture_loop(self):
+        """Read and process frames until stopped, publishing each result."""
+        seq = 0
+        while self._running:
+            result = self._process_frame(seq)
+            if result is None:
+                # Camera hiccup; back off briefly instead of spinning.
+                time.sleep(0.01)
+                continue
+            seq = result.seq
+            self.results.publish(result)
+
+    def _process_frame(self, after):
+        """Run hand detection on the newest frame with a seq past after."""
+        captured = self.camera.wait_for_frame(after, timeout=0.5)
+        if captured is None:
+            return None
+        # Feedback is drawn on the frame, so copy it out of the ring buffer.
+        frame = captured.image.copy()
+
+        if self.adaptive:
+            landmarks, timestamp = self._track_adaptive(frame, captured.timestamp)
+            if landmarks:
+                self._draw_hand_feedback(frame, landmarks)
+            return HandResult(captured.seq, timestamp, landmarks, frame)
+
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
-        
+        with profiler.phase('hands.process'):
+            results = self.hands.process(frame_rgb)
+
         # Draw hand landmarks if detected
+        landmarks = None
         if results.multi_hand_landmarks:
             for hand_landmarks in results.multi_hand_landmarks:
                 self._draw_hand_feedback(frame, hand_landmarks)
-            return results.multi_hand_landmarks[0], frame
-        return None, frame
+            landmarks = results.multi_hand_landmarks[0]
+        return HandResult(captured.seq, captured.timestamp, landmarks, frame)
+
+    def _track_adaptive(self, frame, timestamp):
+        """Find the hand in frame, reusing the last result if nothing moved.
+
+        Returns the landmarks and the timestamp of the frame they were
+        inferred from, which is an earlier frame's when they're reused.
+        """
+        height, width = frame.shape[:2]
+        thumbnail = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY),
+                               (width // 8, height // 8),
+                               interpolation=cv2.INTER_AREA)
+        if self._reference is not None and self._skipped < self.max_skipped:
+            # Mean change since the last inferred frame, around the hand.
+            left, top, right, bottom = self.roi or (0, 0, width, height)
+            region = (slice(top // 8, bottom // 8 + 1), slice(left // 8, right // 8 + 1))
+            difference = cv2.absdiff(thumbnail[region], self._reference[region])
+            if difference.mean() < self.motion_threshold:
+                self._skipped += 1
+                self.frames_skipped += 1
+                return self._last_landmarks, self._inferred_at
+
+        left, top, right, bottom = self.roi or (0, 0, width, height)
+        image = frame[top:bottom, left:right]
+        model_complexity, scale = QUALITY_LEVELS[self.level]
+        if scale != 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_AREA)
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        start = time.perf_counter()
+        with profiler.phase('hands.process'):
+            results = self.hands.process(image)
+        elapsed = time.perf_counter() - start
+        self.inferences.append((time.monotonic(), elapsed))
+        self._adapt_quality(elapsed)
+
+        landmarks = None
+        if results.multi_hand_landmarks:
+            landmarks = results.multi_hand_landmarks[0]
+            # Landmarks are relative to the crop; make them relative to the frame.
+            for landmark in landmarks.landmark:
+                landmark.x = (left + landmark.x * (right - left)) / width
+                landmark.y = (top + landmark.y * (bottom - top)) / height
+        self._update_roi(landmarks, width, height)
+
+        self._reference = thumbnail
+        self._last_landmarks = landmarks
+        self._inferred_at = timestamp
+        self._skipped = 0
+        return landmarks, timestamp
+
+    def _update_roi(self, landmarks, width, height):
+        """Crop the next inference around the hand, or not at all if it's gone.
+
+        The crop is only moved when the hand nears its edge, so the tracker
+        mostly sees a steady view.
+        """
+        if landmarks is None:
+            self.roi = None
+            return
+        xs = [landmark.x * width for landmark in landmarks.landmark]
+        ys = [landmark.y * height for landmark in landmarks.landmark]
+        hand = (min(xs), min(ys), max(xs), max(ys))
+        size = max(hand[2] - hand[0], hand[3] - hand[1])
+
+        if self.roi is not None:
+            left, top, right, bottom = self.roi
+            margin = size * 0.25
+            if (hand[0] - left > margin and hand[1] - top > margin and
+                    right - hand[2] > margin and bottom - hand[3] > margin):
+                return
+
+        # A square twice the hand's size, at least a quarter of the frame.
+        half = max(size, min(width, height) / 4)
+        center_x = (hand[0] + hand[2]) / 2
+        center_y = (hand[1] + hand[3]) / 2
+        self.roi = (max(int(center_x - half), 0), max(int(center_y - half), 0),
+                    min(int(center_x + half), width), min(int(center_y + half), height))
+
+    def _adapt_quality(self, elapsed):
+        """Step the quality level down or up to keep inference in budget."""
+        self._since_change += 1
+        if self._since_change == 1:
+            # The first inference after a change includes warm-up.
+            return
+        if self._average_time is None:
+            self._average_time = elapsed
+        self._average_time += 0.1 * (elapsed - self._average_time)
+
+        level = self.level
+        if (self._average_time > self.frame_budget and self._since_change > 15
+                and level < len(QUALITY_LEVELS) - 1):
+            level += 1
+            if self._upgraded:
+                self._upgrade_wait *= 2
+        elif (self._average_time < self.frame_budget / 2
+                and self._since_change > self._upgrade_wait and level > 0):
+            level -= 1
+        if level == self.level:
+            return
+        self._upgraded = level < self.level
+
+        model_complexity = QUALITY_LEVELS[level][0]
+        if model_complexity != QUALITY_LEVELS[self.level][0]:
+            self.hands.close()
+            self.hands = self._make_hands(model_complexity)
+        self.level = level
+        self._average_time = None
+        self._since_change = 0
+
+    def tracking_stats(self):
+        """Return inference FPS and time, frames skipped and quality settings."""
+        recent = [elapsed for finished, elapsed in list(self.inferences)
+                  if finished > time.monotonic() - 1.0]
+        model_complexity, scale = QUALITY_LEVELS[self.level]
+        return {
+            'inference_fps': len(recent),
+            'inference_ms': sum(recent) / len(recent) * 1000 if recent else None,
+            'frames_skipped': self.frames_skipped,
+            'model_complexity': model_complexity,
+            'scale': scale,
+        }
+
+    def get_hand_landmarks(self):
+        """Return the latest hand landmarks and the camera frame, if new.
+
+        In threaded mode this never waits for the camera: it returns the
+        most recent published result, and the frame is None when it has
+        already been returned by an earlier call.
+        """
+        if self._thread is None:
+            result = self._process_frame(self._last_seq)
+        else:
+            result = self.results.peek()
+        if result is None:
+            self.result_age = None
+            return None, None
+
+        self.result_age = time.monotonic() - result.timestamp
+        landmarks = result.landmarks
+        if self.result_age > self.max_result_age:
+            landmarks = None
+
+        if result.seq == self._last_seq:
+            return landmarks, None
+        self._last_seq = result.seq
+
+        frame = result.frame
+        cv2.putText(frame, f"Latency: {self.result_age * 1000:.0f} ms",
+                    (10, frame.shape[0] - 15), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6, (255, 255, 255), 1)
+        if self.adaptive:
+            stats = self.tracking_stats()
+            inference_ms = stats['inference_ms'] or 0
+            cv2.putText(frame, f"Inference: {stats['inference_fps']} fps, "
+                        f"{inference_ms:.0f} ms, model {stats['model_complexity']}, "
+                        f"scale {stats['scale']}",
+                        (10, frame.shape[0] - 40), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.6, (255, 255, 255), 1)
+        return landmarks, frame
 
     def _draw_hand_feedback(self, frame, landmarks):
         """Draws hand landmarks and additional visual feedback."""
@@ -40,24 +309,29 @@ class HandController:
             self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2),
             self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
         )
-        
+
         # Get wrist and index finger positions
         h, w, c = frame.shape
         wrist = landmarks.landmark[0]
         index_tip = landmarks.landmark[8]
-        
+
         # Draw gesture-specific feedback
         if self.current_gesture:
-            cv2.putText(frame, f"Gesture: {self.current_gesture}", 
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 
+            cv2.putText(frame, f"Gesture: {self.current_gesture}",
+                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX,
                         0.7, (255, 255, 255), 2)
-            
+
         # Draw connection line between wrist and index finger
         wrist_pos = (int(wrist.x * w), int(wrist.y * h))
         index_pos = (int(index_tip.x * w), int(index_tip.y * h))
         cv2.line(frame, wrist_pos, index_pos, (0, 255, 255), 2)
 
     def release(self):
-        """Release camera resources."""
-        self.cap.release()
+        """Stop the capture thread and release the camera if it's ours."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.owns_camera:
+            self.camera.release()
         cv2.destroyAllWindows()
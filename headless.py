@@ -0,0 +1,129 @@
+"""Run the Alien Invasion game logic without a window, webcam or database."""
+import os
+import random
+
+# SDL must be told before pygame initializes the display.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from settings import Settings
+from game_stats import GameStats
+from scoreboard import Scoreboard
+from button import Button
+from ship import Ship
+from bullet import Bullets
+from fleet import Fleet
+from renderer import Renderer
+import game_functions as gf
+
+def sweep_and_fire(period=240):
+    """Return a script that sweeps the ship side to side, firing constantly.
+
+    The ship changes direction every period steps.
+    """
+    def script(step):
+        moving_right = (step // period) % 2 == 0
+        return not moving_right, moving_right, True
+    return script
+
+def random_inputs(seed=0, hold=30):
+    """Return a script that picks a random input every hold steps."""
+    rng = random.Random(seed)
+    choices = [(True, False), (False, True), (False, False)]
+    current = [(False, False, False)]
+
+    def script(step):
+        if step % hold == 0:
+            moving_left, moving_right = rng.choice(choices)
+            current[0] = (moving_left, moving_right, rng.random() < 0.5)
+        return current[0]
+    return script
+
+class HeadlessGame():
+    """Drive the same game_functions logic as run_game() from scripted inputs.
+
+    A script is a callable taking the step number and returning the
+    (moving_left, moving_right, fire) inputs for that step.
+    """
+
+    def __init__(self, ai_settings=None, script=None, render=False, pauses=False):
+        """Set up the game objects on a dummy display.
+
+        Unless pauses is set, the respawn and level pauses are turned off
+        so every step moves the game on.
+        """
+        pygame.display.init()
+        pygame.font.init()
+
+        self.ai_settings = ai_settings or Settings()
+        if not pauses:
+            self.ai_settings.ship_hit_pause = 0
+            self.ai_settings.level_pause = 0
+        self.screen = pygame.display.set_mode(
+            (self.ai_settings.screen_width, self.ai_settings.screen_height))
+        self.script = script or sweep_and_fire()
+        self.render = render
+        self.time_step = 1.0 / self.ai_settings.simulation_rate
+
+        self.stats = GameStats(self.ai_settings)
+        self.play_button = Button(self.ai_settings, self.screen, "Play")
+        self.sb = Scoreboard(self.ai_settings, self.screen, self.stats)
+        self.ship = Ship(self.ai_settings, self.screen)
+        self.bullets = Bullets(self.ai_settings, self.screen)
+        self.aliens = Fleet(self.ai_settings, self.screen)
+        self.renderer = Renderer(self.ai_settings, self.screen)
+        self.steps = 0
+        self.games_played = 0
+
+    def start(self, level=1):
+        """Start a new game at the given level, as if Play were clicked."""
+        self.ai_settings.initialize_dynamic_settings()
+        self.stats.reset_stats()
+        for _ in range(level - 1):
+            self.ai_settings.increase_speed()
+        self.stats.level = level
+        self.stats.game_active = True
+        self.games_played += 1
+
+        self.sb.prep_score()
+        self.sb.prep_high_score()
+        self.sb.prep_level()
+        self.sb.prep_ships()
+
+        self.aliens.empty()
+        self.bullets.empty()
+        gf.create_fleet(self.ai_settings, self.screen, self.ship, self.aliens)
+        self.ship.center_ship()
+
+    def step(self):
+        """Apply this step's scripted inputs and advance the game one step."""
+        if not self.stats.game_active:
+            self.start()
+
+        moving_left, moving_right, fire = self.script(self.steps)
+        self.ship.moving_left = moving_left
+        self.ship.moving_right = moving_right
+        if fire:
+            gf.fire_bullet(self.ai_settings, self.screen, self.stats, self.ship,
+                           self.bullets)
+
+        gf.update_game(self.ai_settings, self.screen, self.stats, self.sb,
+                       self.ship, self.aliens, self.bullets, self.time_step)
+        if self.render:
+            self.renderer.update_screen(self.stats, self.sb, self.ship, self.aliens,
+                                        self.bullets, self.play_button)
+        self.steps += 1
+
+    def run(self, steps):
+        """Run the given number of steps."""
+        for _ in range(steps):
+            self.step()
+
+if __name__ == '__main__':
+    game = HeadlessGame(render=True)
+    game.start()
+    game.run(10 * game.ai_settings.simulation_rate)
+    print(f"{game.steps} steps, {game.games_played} game(s), "
+          f"score {game.stats.score}, level {game.stats.level}")
@@ -0,0 +1,117 @@
+import struct
+import zlib
+from collections import namedtuple
+
+import pygame
+
+MAGIC = b'AIIL'
+VERSION = 1
+
+# Header: magic, version, RNG seed, simulation rate, screen size and the
+# player's high score at the start of the session.
+HEADER = struct.Struct('<4sBIHHHQ')
+# Frame: milliseconds since the last frame, simulation steps due, gesture
+# bits and the number of events that follow.
+FRAME = struct.Struct('<HBBB')
+# Event: type code and two values (the key, or the mouse position).
+EVENT = struct.Struct('<BII')
+
+GESTURE_SEEN, GESTURE_LEFT, GESTURE_RIGHT, GESTURE_FIRE = 1, 2, 4, 8
+KEYDOWN, KEYUP, MOUSEBUTTONDOWN = 1, 2, 3
+
+# The keys game_functions responds to; other keys aren't recorded.
+RECORDED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+
+LogHeader = namedtuple('LogHeader', ['seed', 'simulation_rate', 'screen_width',
+                                     'screen_height', 'high_score'])
+# One frame's inputs: gesture is (moving_left, moving_right, fire) or None
+# when no hand was seen, and events are pygame events.
+LogFrame = namedtuple('LogFrame', ['frame_ms', 'steps', 'gesture', 'events'])
+
+class InputRecorder():
+    """Write a session's inputs to a compact binary log.
+
+    Each frame is a few bytes, and the stream is zlib-compressed, so an
+    idle stretch of frames costs next to nothing.
+    """
+
+    def __init__(self, path, ai_settings, seed, high_score=0):
+        """Open path and write the log header."""
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, ai_settings.simulation_rate,
+                                    ai_settings.screen_width, ai_settings.screen_height,
+                                    high_score))
+        self.compressor = zlib.compressobj()
+        self.frames = 0
+
+    def record_frame(self, frame_ms, steps, gesture, events):
+        """Record one frame's inputs.
+
+        gesture is what check_hand_gesture() returned, and events are the
+        pygame events passed to check_events().
+        """
+        bits = 0
+        if gesture is not None:
+            moving_left, moving_right, fire = gesture
+            bits = (GESTURE_SEEN | GESTURE_LEFT * moving_left |
+                    GESTURE_RIGHT * moving_right | GESTURE_FIRE * fire)
+
+        packed = []
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key in RECORDED_KEYS:
+                packed.append(EVENT.pack(KEYDOWN, event.key, 0))
+            elif event.type == pygame.KEYUP and event.key in RECORDED_KEYS:
+                packed.append(EVENT.pack(KEYUP, event.key, 0))
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                packed.append(EVENT.pack(MOUSEBUTTONDOWN, *event.pos))
+
+        data = FRAME.pack(min(frame_ms, 0xffff), steps, bits, len(packed))
+        self.file.write(self.compressor.compress(data + b''.join(packed)))
+        self.frames += 1
+        if self.frames % 600 == 0:
+            # Get everything so far onto disk, in case the game crashes.
+            self.file.write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def close(self):
+        """Finish the compressed stream and close the file."""
+        if not self.file.closed:
+            self.file.write(self.compressor.flush())
+            self.file.close()
+
+def read_input_log(path):
+    """Return a log's LogHeader and a list of its LogFrames."""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        data = zlib.decompressobj().decompress(f.read())
+
+    magic, version, *fields = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} input log")
+
+    frames = []
+    offset = 0
+    # A log cut short by a crash ends at the last whole frame.
+    while offset + FRAME.size <= len(data):
+        frame_ms, steps, bits, event_count = FRAME.unpack_from(data, offset)
+        offset += FRAME.size
+        if offset + event_count * EVENT.size > len(data):
+            break
+
+        gesture = None
+        if bits & GESTURE_SEEN:
+            gesture = (bool(bits & GESTURE_LEFT), bool(bits & GESTURE_RIGHT),
+                       bool(bits & GESTURE_FIRE))
+
+        events = []
+        for _ in range(event_count):
+            kind, a, b = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            if kind == KEYDOWN:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=a))
+            elif kind == KEYUP:
+                events.append(pygame.event.Event(pygame.KEYUP, key=a))
+            else:
+                events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN,
+                                                 pos=(a, b), button=1))
+        frames.append(LogFrame(frame_ms, steps, gesture, events))
+    return LogHeader(*fields), frames
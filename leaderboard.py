@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pygame
+
+import assets
+from profiler import profiler
+
+class LeaderboardCache():
+    """The top players, fetched in the background and kept for ttl seconds.
+
+    Reading the cache never touches the database: a stale or invalidated
+    cache hands back what it has and starts a refresh on a worker thread.
+    """
+
+    def __init__(self, auth, ttl=30.0, limit=10):
+        """Initialize an empty cache; the first get() starts a fetch."""
+        self.auth = auth
+        self.ttl = ttl
+        self.limit = limit
+
+        # (username, high_score) rows, and a number bumped when they change.
+        self.entries = []
+        self.version = 0
+        self.fetched_at = None
+        self.fetching = False
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        """Refetch on the next get(), e.g. after a high score is written."""
+        self.fetched_at = None
+
+    def get(self):
+        """Return the cached rows and their version, refreshing if stale."""
+        stale = (self.fetched_at is None or
+                 time.monotonic() - self.fetched_at > self.ttl)
+        if stale:
+            with self.lock:
+                if not self.fetching:
+                    self.fetching = True
+                    threading.Thread(target=self._fetch, name="leaderboard",
+                                     daemon=True).start()
+        return self.entries, self.version
+
+    def _fetch(self):
+        """Query the leaderboard and publish it if it changed."""
+        try:
+            # Mark it fresh first, so an invalidate() during the query
+            # triggers another fetch.
+            self.fetched_at = time.monotonic()
+            with profiler.phase('mongo.leaderboard'):
+                rows = self.auth.get_leaderboard(self.limit)
+            entries = [(row["username"], row.get("high_score", 0)) for row in rows]
+            # The first fetch always counts, even if there are no scores.
+            if entries != self.entries or not self.version:
+                self.entries = entries
+                self.version += 1
+        finally:
+            with self.lock:
+                self.fetching = False
+
+class LeaderboardOverlay():
+    """An in-game leaderboard panel, rendered only when the rankings change."""
+
+    def __init__(self, ai_settings, screen, cache, player_name=None):
+        """Initialize the panel's fonts and colors."""
+        self.screen = screen
+        self.ai_settings = ai_settings
+        self.cache = cache
+        self.player_name = player_name
+        self.visible = False
+
+        self.text_color = (30, 30, 30)
+        self.highlight_color = (0, 120, 0)
+        self.panel_color = (210, 210, 215)
+        self.title_font = assets.get_font(None, 36)
+        self.font = assets.get_font(None, 28)
+
+        self.image = None
+        self.rect = None
+        self.version = None
+
+    def toggle(self):
+        """Show or hide the panel."""
+        self.visible = not self.visible
+
+    def prep_leaderboard(self):
+        """Render the panel if the cached rankings changed."""
+        entries, version = self.cache.get()
+        if version == self.version:
+            return
+        self.version = version
+
+        lines = [self.title_font.render("LEADERBOARD", True, self.text_color)]
+        if not entries:
+            message = "No scores yet" if version else "Loading..."
+            lines.append(self.font.render(message, True, self.text_color))
+        for rank, (username, high_score) in enumerate(entries, 1):
+            color = (self.highlight_color if username == self.player_name
+                     else self.text_color)
+            line = "{}. {}  {:,}".format(rank, username, high_score)
+            lines.append(self.font.render(line, True, color))
+
+        padding = 12
+        width = max(line.get_width() for line in lines) + 2 * padding
+        height = sum(line.get_height() + 4 for line in lines) + 2 * padding
+        self.image = pygame.Surface((width, height))
+        self.image.fill(self.panel_color)
+        y = padding
+        for line in lines:
+            self.image.blit(line, (padding, y))
+            y += line.get_height() + 4
+
+        # Sit below the remaining-ships icons on the left.
+        self.rect = self.image.get_rect()
+        self.rect.left = 10
+        self.rect.top = 80
+
+    def draw(self):
+        """Draw the panel if it's visible."""
+        if self.visible:
+            self.prep_leaderboard()
+            self.screen.blit(self.image, self.rect)
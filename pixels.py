@@ -0,0 +1,5 @@
+import numpy as np
+
+def round_pixels(x):
+    """Round positions to whole pixels the way pygame.Rect does."""
+    return np.trunc(x + np.copysign(0.5, x)).astype(np.int64)
@@ -10,9 +10,30 @@ from gridfs import GridFS
 from bson import Binary
 from pygame.locals import *
 
+from face_index import FaceIndex
+from face_detect import FaceDetector
+from camera_service import CameraService
+
+# How faces are found in stored photos and encoded, at enrollment and login
+# alike. Encodings made with other options don't match these, so
+# reenroll.py uses the same ones; change them only together with a rerun.
+FACE_LOCATION_OPTIONS = {"number_of_times_to_upsample": 1, "model": "hog"}
+FACE_ENCODING_OPTIONS = {"num_jitters": 1, "model": "small"}
+
+def encode_face_encoding(encoding):
+    """Pack a 128-d face encoding into compact float32 bytes for storage"""
+    return Binary(np.asarray(encoding, dtype=np.float32).tobytes())
+
+def decode_face_encoding(data):
+    """Unpack a stored face encoding into a float64 array"""
+    return np.frombuffer(data, dtype=np.float32).astype(np.float64)
+
 class PlayerAuth:
-    def __init__(self):
-        """Initialize MongoDB connection and camera"""
+    def __init__(self, camera=True):
+        """Initialize MongoDB connection and, optionally, camera and sound
+
+        camera may be a CameraService to share, True to open one, or False
+        """
         try:
             self.client = MongoClient('mongodb://localhost:27017/', 
                                     serverSelectionTimeoutMS=5000,
@@ -26,12 +47,29 @@ class PlayerAuth:
             # Create indexes if they don't exist
             self.players.create_index("username", unique=True)
             self.players.create_index("high_score")
+            self.players.create_index("encoding_updated_at", sparse=True)
         except Exception as e:
             print(f"Failed to connect to MongoDB: {e}")
             raise
         
+        # Face index for username-less login, loaded on first use
+        self._face_index = None
+        
+        # The last captured photo and its face, so it's only detected once
+        self.detector = FaceDetector()
+        self.last_photo = None
+        self.last_face_location = None
+        
         # Camera initialization
-        self.cap = None
+        self.camera = None
+        self.owns_camera = False
+        self.capture_sound = None
+        self._preview_seq = 0
+        if not camera:
+            return
+        # A shared camera is released by whoever opened it
+        self.owns_camera = not isinstance(camera, CameraService)
+        self.camera = CameraService() if self.owns_camera else camera
         self.init_camera()
         
         # Initialize pygame mixer for sound feedback
@@ -48,18 +86,9 @@ class PlayerAuth:
         return hashlib.sha256((password + salt).encode()).hexdigest()
 
     def init_camera(self):
-        """Initialize the camera with multiple fallback options"""
-        if self.cap is None:
-            # Try different camera indexes
-            for i in range(3):  # Try up to 3 different camera indexes
-                self.cap = cv2.VideoCapture(i)
-                if self.cap.isOpened():
-                    # Set camera resolution for better face recognition
-                    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                    break
-                if self.cap:
-                    self.cap.release()
+        """Start the camera service, which tries several camera indexes"""
+        if self.camera:
+            self.camera.start()
 
     def register_player(self, username, password, photo):
         """Register new player with photo in MongoDB"""
@@ -78,10 +107,17 @@ class PlayerAuth:
             rgb_photo = cv2.cvtColor(photo, cv2.COLOR_BGR2RGB)
             
             # Face detection validation
-            face_locations = face_recognition.face_locations(rgb_photo)
+            face_locations = self._face_locations(photo)
             if not face_locations:
                 print("No face detected in photo")
                 return False
+            
+            # Encode the face once now, so logins never have to
+            encodings = face_recognition.face_encodings(rgb_photo, face_locations,
+                                                        **FACE_ENCODING_OPTIONS)
+            if not encodings:
+                print("Could not extract face encoding")
+                return False
                 
             # Convert photo to binary
             _, buffer = cv2.imencode('.jpg', photo)
@@ -91,18 +127,26 @@ class PlayerAuth:
             photo_id = self.fs.put(photo_binary, filename=f"{username}_photo.jpg")
             
             # Create player document with hashed password
+            now = datetime.datetime.now()
             player_data = {
                 "username": username,
                 "password": self._hash_password(password),
                 "photo_id": photo_id,
+                "face_encoding": encode_face_encoding(encodings[0]),
+                "encoding_updated_at": now,
                 "high_score": 0,
-                "created_at": datetime.datetime.now(),
-                "last_login": datetime.datetime.now()
+                "created_at": now,
+                "last_login": now
             }
             
             # Insert into database
             result = self.players.insert_one(player_data)
             
+            # Keep the face index in step, if it's been loaded
+            if self._face_index is not None:
+                self._face_index.add(username, encodings[0], result.inserted_id, now)
+                self._face_index.save_snapshot()
+            
             # Play capture sound if available
             if self.capture_sound:
                 self.capture_sound.play()
@@ -132,25 +176,22 @@ class PlayerAuth:
                 print("Password mismatch")
                 return False
                 
-            # Get stored photo from GridFS
-            stored_photo = self.fs.get(player["photo_id"]).read()
-            nparr = np.frombuffer(stored_photo, np.uint8)
-            stored_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Use the encoding stored at registration
+            stored_encoding = self.get_stored_encoding(player)
+            if stored_encoding is None:
+                print("Could not extract stored face encoding")
+                return False
             
-            # Convert both images to RGB
-            rgb_stored = cv2.cvtColor(stored_image, cv2.COLOR_BGR2RGB)
             rgb_camera = cv2.cvtColor(camera_photo, cv2.COLOR_BGR2RGB)
+            camera_encoding = face_recognition.face_encodings(
+                rgb_camera, self._face_locations(camera_photo), **FACE_ENCODING_OPTIONS)
             
-            # Get face encodings
-            stored_encoding = face_recognition.face_encodings(rgb_stored)
-            camera_encoding = face_recognition.face_encodings(rgb_camera)
-            
-            if not stored_encoding or not camera_encoding:
+            if not camera_encoding:
                 print("Could not extract face encodings")
                 return False
                 
             # Compare faces
-            matches = face_recognition.compare_faces([stored_encoding[0]], camera_encoding[0])
+            matches = face_recognition.compare_faces([stored_encoding], camera_encoding[0])
             
             # Update last login time if successful
             if matches[0]:
@@ -168,53 +209,212 @@ class PlayerAuth:
             print(f"Verification error: {e}")
             return False
 
-    def capture_photo(self):
-        """Capture photo from webcam with retries and validation"""
+    def get_stored_encoding(self, player):
+        """Return a player's stored face encoding, deriving it if missing
+        
+        Players registered before encodings were stored get theirs computed
+        from the GridFS photo once and saved back to their document, stamped
+        so a face index snapshot taken earlier picks it up.
+        """
+        if player.get("face_encoding"):
+            return decode_face_encoding(player["face_encoding"])
+        
+        encoding = self._encoding_from_photo(player["photo_id"])
+        if encoding is not None:
+            now = datetime.datetime.now()
+            self.players.update_one(
+                {"_id": player["_id"]},
+                {"$set": {"face_encoding": encode_face_encoding(encoding),
+                          "encoding_updated_at": now}}
+            )
+            if self._face_index is not None:
+                self._face_index.add(player["username"], encoding, updated_at=now)
+                self._face_index.save_snapshot()
+        return encoding
+
+    def _encoding_from_photo(self, photo_id):
+        """Compute the face encoding of a photo stored in GridFS"""
+        stored_photo = self.fs.get(photo_id).read()
+        nparr = np.frombuffer(stored_photo, np.uint8)
+        stored_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if stored_image is None:
+            return None
+        
+        rgb_stored = cv2.cvtColor(stored_image, cv2.COLOR_BGR2RGB)
+        locations = face_recognition.face_locations(rgb_stored, **FACE_LOCATION_OPTIONS)
+        encodings = face_recognition.face_encodings(rgb_stored, locations,
+                                                    **FACE_ENCODING_OPTIONS)
+        return encodings[0] if encodings else None
+
+    def migrate_face_encodings(self):
+        """Store face encodings for every player that doesn't have one yet
+        
+        Returns the number of players migrated and the number that failed.
+        """
+        migrated = failed = 0
+        missing = {"$or": [{"face_encoding": {"$exists": False}},
+                           {"face_encoding": None}]}
+        for player in self.players.find(missing, {"photo_id": 1, "username": 1}):
+            try:
+                if self.get_stored_encoding(player) is not None:
+                    migrated += 1
+                    continue
+                print(f"No face found in photo for {player['username']}")
+            except Exception as e:
+                print(f"Error migrating {player['username']}: {e}")
+            failed += 1
+        return migrated, failed
+
+    @property
+    def face_index(self):
+        """The index of every stored face encoding, loaded on first use"""
+        if self._face_index is None:
+            index = FaceIndex()
+            index.load(self.players, decode_face_encoding)
+            self._face_index = index
+        return self._face_index
+
+    def identify_player(self, password, camera_photo):
+        """Find the player in camera_photo and check their password
+        
+        Returns the matching username, or None if nobody matched.
+        """
+        try:
+            if not password or camera_photo is None:
+                return None
+            
+            rgb_camera = cv2.cvtColor(camera_photo, cv2.COLOR_BGR2RGB)
+            camera_encoding = face_recognition.face_encodings(
+                rgb_camera, self._face_locations(camera_photo), **FACE_ENCODING_OPTIONS)
+            if not camera_encoding:
+                print("Could not extract face encodings")
+                return None
+            
+            # One vectorized search over every enrolled face
+            username = self.face_index.identify(camera_encoding[0])
+            if username is None:
+                print("No matching player")
+                return None
+            
+            player = self.players.find_one({"username": username})
+            if not player or player["password"] != self._hash_password(password):
+                print("Password mismatch")
+                return None
+            
+            self.players.update_one(
+                {"username": username},
+                {"$set": {"last_login": datetime.datetime.now()}}
+            )
+            if self.capture_sound:
+                self.capture_sound.play()
+            print(f"Identified player: {username}")
+            return username
+            
+        except Exception as e:
+            print(f"Identification error: {e}")
+            return None
+
+    def capture_photo(self, progress=None, frames=5, cancelled=None):
+        """Capture the sharpest of several webcam frames that show a face
+
+        progress, if given, is called with "capturing" or "detecting" as
+        the capture moves between grabbing frames and finding a face.
+        cancelled, if given, is checked before each frame; once it returns
+        True the capture stops and returns None
+        """
         self.init_camera()
-        if self.cap and self.cap.isOpened():
-            for _ in range(3):  # Try 3 times to get a good frame
-                ret, frame = self.cap.read()
-                if ret:
-                    # Verify the frame contains a face
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    face_locations = face_recognition.face_locations(rgb_frame)
-                    if face_locations:
-                        return frame
-                    else:
-                        print("No face detected in captured frame")
+        best = None
+        if self.camera and self.camera.is_opened():
+            latest = self.camera.latest()
+            seq = latest.seq if latest else 0
+            fallback = True
+            for _ in range(frames):
+                if cancelled and cancelled():
+                    return None
+                if progress:
+                    progress("capturing")
+                captured = self.camera.wait_for_frame(seq, timeout=1.0)
+                if captured is None:
+                    break
+                seq = captured.seq
+                # Copy it out of the camera's ring buffer
+                frame = captured.image.copy()
+                
+                # Find the face, starting where it was in the last frame
+                if progress:
+                    progress("detecting")
+                face_location = self.detector.detect(frame, fallback=fallback)
+                # The full-resolution pass is slow, so run it once at most
+                fallback = fallback and not self.detector.used_fallback
+                if face_location is None:
+                    continue
+                sharpness = self.detector.sharpness(frame, face_location)
+                if best is None or sharpness > best[0]:
+                    best = (sharpness, frame, face_location)
+            if best is None:
+                print("No face detected in captured frames")
         else:
             print("Camera not available")
-        return None
+        if best is None:
+            return None
+        
+        _, self.last_photo, self.last_face_location = best
+        return self.last_photo
+    
+    def track_face(self):
+        """Find the face in the newest camera frame, so a capture starts around it"""
+        if self.camera:
+            latest = self.camera.latest()
+            if latest is not None:
+                self.detector.detect(latest.image.copy())
+    
+    def _face_locations(self, photo):
+        """Return the face boxes to encode in photo, reusing capture's if it's that photo"""
+        if photo is self.last_photo:
+            return [self.last_face_location]
+        face_location = self.detector.detect(photo, track=False)
+        return [face_location] if face_location else []
     
     def get_camera_frame(self, mirror=True):
-        """Get a frame for preview with optional mirroring"""
-        self.init_camera()
-        if self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if ret:
-                if mirror:
-                    frame = cv2.flip(frame, 1)
-                return frame
-        return None
+        """Get a new frame for preview with optional mirroring
+
+        Returns None if there's no frame newer than the last one returned.
+        Unmirrored frames are the camera's own buffer, so don't keep them.
+        """
+        if not self.camera:
+            return None
+        latest = self.camera.latest()
+        if latest is None or latest.seq == self._preview_seq:
+            return None
+        self._preview_seq = latest.seq
+        if mirror:
+            return cv2.flip(latest.image, 1)
+        return latest.image
     
     def release_camera(self):
-        """Release camera resources"""
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
-        self.cap = None
+        """Release camera resources, if this object opened the camera"""
+        if self.camera and self.owns_camera:
+            self.camera.release()
 
     def update_high_score(self, username, new_score):
         """Update player's high score in MongoDB"""
         try:
-            result = self.players.update_one(
-                {"username": username},
-                {"$max": {"high_score": new_score}}
-            )
-            return result.modified_count > 0
+            return self.save_high_score(username, new_score)
         except Exception as e:
             print(f"Error updating high score: {e}")
             return False
 
+    def save_high_score(self, username, new_score):
+        """Raise player's high score to new_score, letting errors propagate
+        
+        Returns True if the stored high score changed.
+        """
+        result = self.players.update_one(
+            {"username": username},
+            {"$max": {"high_score": new_score}}
+        )
+        return result.modified_count > 0
+
     def get_player_data(self, username):
         """Get all player data by username"""
         try:
@@ -236,6 +436,22 @@ class PlayerAuth:
     
     def __del__(self):
         """Cleanup resources when object is destroyed"""
-        self.release_camera()
+        if hasattr(self, 'owns_camera'):
+            self.release_camera()
         if hasattr(self, 'client'):
-            self.client.close()
\ No newline at end of file
+            self.client.close()
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Alien Invasion player database tools")
+    parser.add_argument("--migrate-encodings", action="store_true",
+                        help="store face encodings for players registered without one")
+    args = parser.parse_args()
+    
+    if args.migrate_encodings:
+        auth = PlayerAuth(camera=False)
+        migrated, failed = auth.migrate_face_encodings()
+        print(f"Migrated {migrated} player(s), {failed} failed")
+    else:
+        parser.print_help()
@@ -0,0 +1,178 @@
+import csv
+import json
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import pygame
+
+import assets
+
+class PhaseTimes():
+    """The most recent durations of one phase, in a fixed-size ring buffer."""
+
+    def __init__(self, window):
+        """Initialize an empty buffer of window durations."""
+        self.times = np.zeros(window)
+        self.count = 0
+
+    def add(self, seconds):
+        """Record one duration, replacing the oldest once the buffer is full."""
+        self.times[self.count % len(self.times)] = seconds
+        self.count += 1
+
+    def summary(self):
+        """Return the count and the mean and percentile durations, in ms."""
+        times = self.times[:min(self.count, len(self.times))] * 1000
+        p50, p95, p99 = np.percentile(times, [50, 95, 99])
+        return {'count': self.count, 'mean_ms': times.mean(), 'p50_ms': p50,
+                'p95_ms': p95, 'p99_ms': p99, 'max_ms': times.max()}
+
+class Phase():
+    """Time a with-block and record it under a phase name."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+class Profiler():
+    """Named phase timers for finding where a frame's time goes.
+
+    Phases are timed with `with profiler.phase(name):` from any thread and
+    kept as histograms of the last window durations. While disabled,
+    phase() hands back a shared do-nothing context, so instrumented code
+    costs one call per phase.
+    """
+
+    def __init__(self, window=600):
+        """Initialize a disabled profiler."""
+        self.enabled = False
+        self.window = window
+        self.phases = {}
+        self._null_phase = nullcontext()
+        self._frame_start = None
+
+        # Where and how often (seconds) to export summaries, if at all.
+        self.export_path = None
+        self.export_interval = 10.0
+        self._exported_at = time.monotonic()
+
+    def phase(self, name):
+        """Return a context manager timing the phase name."""
+        if not self.enabled:
+            return self._null_phase
+        return Phase(self, name)
+
+    def record(self, name, seconds):
+        """Record one duration of the phase name."""
+        times = self.phases.get(name)
+        if times is None:
+            times = self.phases.setdefault(name, PhaseTimes(self.window))
+        times.add(seconds)
+
+    def end_frame(self):
+        """Record the time since the last call as a frame; export if due."""
+        if not self.enabled:
+            self._frame_start = None
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.record('frame', now - self._frame_start)
+        self._frame_start = now
+
+        if (self.export_path and
+                time.monotonic() - self._exported_at > self.export_interval):
+            self.export(self.export_path)
+
+    def summary(self):
+        """Return {phase: summary} for every phase recorded so far."""
+        return {name: times.summary()
+                for name, times in sorted(list(self.phases.items()))}
+
+    def export(self, path):
+        """Write the summary to path, as CSV if it ends in .csv, else JSON."""
+        self._exported_at = time.monotonic()
+        summary = self.summary()
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['phase', 'count', 'mean_ms', 'p50_ms',
+                                 'p95_ms', 'p99_ms', 'max_ms'])
+                for name, row in summary.items():
+                    writer.writerow([name, row['count']] +
+                                    [f"{row[key]:.3f}" for key in
+                                     ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')])
+        else:
+            with open(path, 'w') as f:
+                json.dump({'time': time.time(), 'phases': summary}, f, indent=2)
+
+# The game's profiler, shared by every module that times a phase.
+profiler = Profiler()
+
+class ProfilerOverlay():
+    """An on-screen table of phase percentiles, refreshed a few times a second."""
+
+    def __init__(self, ai_settings, screen, profiler, refresh_interval=0.5):
+        """Initialize the overlay's font and colors."""
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.profiler = profiler
+        self.refresh_interval = refresh_interval
+        self.visible = False
+
+        self.text_color = (240, 240, 240)
+        self.panel_color = (40, 40, 40)
+        self.font = assets.get_font('monospace', 16)
+
+        self.image = None
+        self.rect = None
+        self.refreshed_at = None
+
+    def toggle(self):
+        """Show or hide the overlay, profiling while it's shown."""
+        self.visible = not self.visible
+        # Keep profiling while exporting, shown or not.
+        self.profiler.enabled = self.visible or bool(self.profiler.export_path)
+        self.refreshed_at = None
+
+    def prep_profile(self):
+        """Render the table if it's due a refresh."""
+        now = time.monotonic()
+        if (self.refreshed_at is not None and
+                now - self.refreshed_at < self.refresh_interval):
+            return
+        self.refreshed_at = now
+
+        lines = ["{:<20}{:>8}{:>8}{:>8}".format('phase (ms)', 'p50', 'p95', 'p99')]
+        for name, row in self.profiler.summary().items():
+            lines.append("{:<20}{:>8.2f}{:>8.2f}{:>8.2f}".format(
+                name[:19], row['p50_ms'], row['p95_ms'], row['p99_ms']))
+
+        surfaces = [self.font.render(line, True, self.text_color) for line in lines]
+        padding = 8
+        width = max(surface.get_width() for surface in surfaces) + 2 * padding
+        height = sum(surface.get_height() for surface in surfaces) + 2 * padding
+        self.image = pygame.Surface((width, height))
+        self.image.fill(self.panel_color)
+        y = padding
+        for surface in surfaces:
+            self.image.blit(surface, (padding, y))
+            y += surface.get_height()
+
+        # Sit in the bottom right corner.
+        self.rect = self.image.get_rect()
+        self.rect.right = self.screen_rect.right - 10
+        self.rect.bottom = self.screen_rect.bottom - 10
+
+    def draw(self):
+        """Draw the overlay if it's visible."""
+        if self.visible:
+            self.prep_profile()
+            self.screen.blit(self.image, self.rect)
@@ -0,0 +1,246 @@
+"""Re-derive every player's face encoding from their registration photo
+
+Run after changing FACE_LOCATION_OPTIONS or FACE_ENCODING_OPTIONS in
+player_auth.py, or upgrading face_recognition's models, so stored
+encodings match the ones made at login. Players are read in
+_id order with batched cursors, each batch's photos are fetched from
+GridFS in one query and encoded on a pool of worker processes, and the
+encodings are written back with one bulk write per batch. Progress is
+checkpointed after every batch, so an interrupted run picks up where it
+stopped.
+
+    python reenroll.py --workers 8
+    python reenroll.py --restart
+    python reenroll.py --missing-only
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import face_recognition
+import numpy as np
+from bson import Binary, ObjectId
+from pymongo import UpdateOne
+
+from face_index import FaceIndex
+from player_auth import FACE_ENCODING_OPTIONS, FACE_LOCATION_OPTIONS, PlayerAuth
+
+def init_worker():
+    """Keep each worker to one OpenCV thread; the pool provides the parallelism"""
+    cv2.setNumThreads(1)
+
+def encode_photos(photos, options):
+    """Encode the first face in each (player_id, photo bytes) pair
+
+    Runs in a worker process. Returns (player_id, float32 encoding bytes)
+    pairs, with None for photos that can't be decoded or have no face.
+    """
+    results = []
+    for player_id, data in photos:
+        encoding = None
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is not None:
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            locations = face_recognition.face_locations(rgb, **options["locations"])
+            encodings = face_recognition.face_encodings(rgb, locations,
+                                                        **options["encodings"])
+            if encodings:
+                encoding = np.asarray(encodings[0], dtype=np.float32).tobytes()
+        results.append((player_id, encoding))
+    return results
+
+def read_photos(db, photo_ids, batch_size):
+    """Read several GridFS photos with one query over their chunks
+
+    Returns {photo_id: bytes}; photos without chunks are left out.
+    """
+    chunks = {}
+    cursor = db.fs.chunks.find({"files_id": {"$in": photo_ids}},
+                               {"files_id": 1, "data": 1})
+    for chunk in cursor.sort([("files_id", 1), ("n", 1)]).batch_size(batch_size):
+        chunks.setdefault(chunk["files_id"], []).append(chunk["data"])
+    return {photo_id: b"".join(parts) for photo_id, parts in chunks.items()}
+
+def batches(cursor, batch_size):
+    """Yield lists of up to batch_size documents from cursor"""
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class Checkpoint:
+    """How far a run has got, kept in a JSON file between runs"""
+
+    def __init__(self, path, options):
+        """Load the checkpoint at path, if there is one made with options"""
+        self.path = path
+        self.options = options
+        self.last_id = None
+        self.done = 0
+        self.failed = 0
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        if state["options"] != options:
+            raise ValueError(f"{path} was made with other options; "
+                             "rerun with --restart to start over")
+        self.last_id = ObjectId(state["last_id"])
+        self.done = state["done"]
+        self.failed = state["failed"]
+
+    def save(self, last_id):
+        """Record that every player up to last_id has been handled"""
+        self.last_id = last_id
+        # Write beside the old file and swap it in, so a crash can't
+        # leave a half-written checkpoint.
+        with open(self.path + ".tmp", "w") as f:
+            json.dump({"last_id": str(last_id), "done": self.done,
+                       "failed": self.failed, "options": self.options}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def remove(self):
+        """Delete the checkpoint once the run is complete"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def reenroll(auth, options, checkpoint, workers, batch_size, missing_only=False,
+             clear_failed=False, report_interval=5.0):
+    """Re-encode players' photos and store the encodings
+
+    Returns the usernames of players handled in this run whose photo gave
+    no encoding.
+    """
+    query = {}
+    if missing_only:
+        query["$or"] = [{"face_encoding": {"$exists": False}}, {"face_encoding": None}]
+    if checkpoint.last_id is not None:
+        query["_id"] = {"$gt": checkpoint.last_id}
+    total = auth.players.count_documents(query)
+    print(f"{total} player(s) to re-enroll with {workers} worker(s)"
+          + (f", resuming after {checkpoint.done + checkpoint.failed}"
+             if checkpoint.last_id is not None else ""))
+
+    cursor = auth.players.find(query, {"username": 1, "photo_id": 1})
+    cursor = cursor.sort("_id", 1).batch_size(batch_size)
+    failed_usernames = []
+    handled = 0
+    start = reported = time.monotonic()
+
+    def finish(players, future):
+        """Write one batch's results back and checkpoint past it"""
+        nonlocal handled
+        encodings = dict(future.result())
+        now = datetime.datetime.now()
+        updates = []
+        failed_ids = []
+        for player in players:
+            encoding = encodings.get(player["_id"])
+            if encoding is None:
+                failed_ids.append(player["_id"])
+                failed_usernames.append(player["username"])
+            else:
+                updates.append(UpdateOne({"_id": player["_id"]},
+                                         {"$set": {"face_encoding": Binary(encoding),
+                                                   "encoding_updated_at": now}}))
+        if updates:
+            auth.players.bulk_write(updates, ordered=False)
+        if failed_ids and clear_failed:
+            # An encoding from the old model can't be compared with new ones.
+            auth.players.update_many({"_id": {"$in": failed_ids}},
+                                     {"$set": {"face_encoding": None,
+                                               "encoding_updated_at": now}})
+        checkpoint.done += len(updates)
+        checkpoint.failed += len(failed_ids)
+        checkpoint.save(players[-1]["_id"])
+        handled += len(players)
+
+    # Keep every worker busy with a batch queued behind it, while this
+    # process reads photos and writes results. Batches are finished in
+    # order, so the checkpoint never passes an unfinished one.
+    in_flight = deque()
+    with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+        for players in batches(cursor, batch_size):
+            photos = read_photos(auth.db, [player["photo_id"] for player in players],
+                                 batch_size)
+            items = [(player["_id"], photos[player["photo_id"]])
+                     for player in players if player["photo_id"] in photos]
+            in_flight.append((players, pool.submit(encode_photos, items, options)))
+            while len(in_flight) > 2 * workers:
+                finish(*in_flight.popleft())
+
+            now = time.monotonic()
+            if now - reported >= report_interval:
+                reported = now
+                report(handled, total, now - start)
+        while in_flight:
+            finish(*in_flight.popleft())
+
+    report(handled, total, time.monotonic() - start)
+    return failed_usernames
+
+def report(handled, total, elapsed):
+    """Print progress, throughput and the time left"""
+    if not handled or elapsed <= 0:
+        print(f"0/{total} players, {elapsed:.0f} s elapsed")
+        return
+    rate = handled / elapsed
+    print(f"{handled}/{total} players, {rate:.1f} players/s, "
+          f"{elapsed:.0f} s elapsed, ~{(total - handled) / rate:.0f} s left")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="encoding processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=32,
+                        help="players per cursor batch and per worker task")
+    parser.add_argument("--missing-only", action="store_true",
+                        help="only players without a stored encoding")
+    parser.add_argument("--clear-failed", action="store_true",
+                        help="clear the old encoding of players whose photo gives none")
+    parser.add_argument("--checkpoint", default="reenroll.checkpoint.json")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore any checkpoint and start from the first player")
+    args = parser.parse_args()
+
+    # The game's own options, so the encodings stored match its logins
+    options = {"locations": FACE_LOCATION_OPTIONS, "encodings": FACE_ENCODING_OPTIONS,
+               "missing_only": args.missing_only}
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    try:
+        checkpoint = Checkpoint(args.checkpoint, options)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    auth = PlayerAuth(camera=False)
+    # Nearly every encoding changes and cleared ones would linger in the
+    # snapshot, so the game rebuilds it from the database instead.
+    FaceIndex().delete_snapshot()
+
+    start = time.monotonic()
+    failed = reenroll(auth, options, checkpoint, args.workers, args.batch_size,
+                      args.missing_only, args.clear_failed)
+    elapsed = time.monotonic() - start
+    checkpoint.remove()
+
+    print(f"Re-enrolled {checkpoint.done} player(s), {checkpoint.failed} failed, "
+          f"in {elapsed:.0f} s")
+    if failed:
+        shown = ", ".join(failed[:20])
+        more = f" and {len(failed) - 20} more" if len(failed) > 20 else ""
+        print(f"No face found for {shown}{more}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import pygame
+
+import game_functions as gf
+
+class Renderer():
+    """Draw the gameplay screen, either in full or only where it changed.
+
+    In 'full' mode every frame is filled, redrawn and flipped. In 'dirty'
+    mode only what was drawn last frame is erased, and only the erased
+    areas plus what's drawn this frame are pushed to the display.
+    """
+
+    def __init__(self, ai_settings, screen):
+        """Initialize the renderer for the given screen."""
+        self.ai_settings = ai_settings
+        self.screen = screen
+        self.screen_area = screen.get_width() * screen.get_height()
+
+        # Rects of the moving elements drawn last frame, and the
+        # (image, rect) pairs of the scoreboard and Play button.
+        self.moving_rects = []
+        self.static_items = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Redraw and push the whole screen next frame."""
+        self.full_redraw = True
+
+    def update_screen(self, stats, sb, ship, aliens, bullets, play_button, alpha=1.0):
+        """Draw the frame and push it to the display."""
+        if self.ai_settings.render_mode != 'dirty':
+            gf.update_screen(self.ai_settings, self.screen, stats, sb, ship,
+                             aliens, bullets, play_button, alpha)
+            return
+
+        static_items = self._static_items(stats, sb, play_button)
+        if self.full_redraw:
+            self.screen.fill(self.ai_settings.bg_color)
+            self.moving_rects = gf.draw_game(self.ai_settings, self.screen, stats, sb,
+                                             ship, aliens, bullets, play_button, alpha)
+            self.static_items = static_items
+            self.full_redraw = False
+            pygame.display.flip()
+            return
+
+        # Scoreboard images that were replaced or removed must be erased;
+        # new ones must be pushed.
+        removed = list(_difference(self.static_items, static_items))
+        added = list(_difference(static_items, self.static_items))
+
+        erased = self.moving_rects + removed
+        bg_color = self.ai_settings.bg_color
+        for rect in erased:
+            self.screen.fill(bg_color, rect)
+
+        # Redrawing everything restores anything the erasing clipped.
+        moving_rects = gf.draw_game(self.ai_settings, self.screen, stats, sb,
+                                    ship, aliens, bullets, play_button, alpha)
+        dirty = erased + moving_rects + added
+
+        if sum(rect.width * rect.height for rect in dirty) > self.screen_area // 2:
+            # Pushing lots of small rects costs more than one flip.
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+
+        self.moving_rects = moving_rects
+        self.static_items = static_items
+
+    def _static_items(self, stats, sb, play_button):
+        """Return (image, rect) pairs for the scoreboard, overlays and Play button."""
+        items = [(sb.score_image, sb.score_rect),
+                 (sb.high_score_image, sb.high_score_rect),
+                 (sb.level_image, sb.level_rect)]
+        items.extend((ship.image, ship.rect) for ship in sb.ships.sprites())
+        if sb.leaderboard and sb.leaderboard.visible:
+            sb.leaderboard.prep_leaderboard()
+            items.append((sb.leaderboard.image, sb.leaderboard.rect))
+        if sb.profile_overlay and sb.profile_overlay.visible:
+            sb.profile_overlay.prep_profile()
+            items.append((sb.profile_overlay.image, sb.profile_overlay.rect))
+        if not stats.game_active:
+            items.append((play_button.msg_image, play_button.rect))
+        # Copy the rects so later moves show up as changes.
+        return [(image, pygame.Rect(rect)) for image, rect in items]
+
+def _difference(items, others):
+    """Yield the rects of items with no identical (image, rect) in others."""
+    for image, rect in items:
+        if not any(image is other_image and rect == other_rect
+                   for other_image, other_rect in others):
+            yield rect
@@ -0,0 +1,124 @@
+"""Replay a recorded session's inputs through the game, without a camera.
+
+    python replay.py recordings/session-20260101-120000.ail
+    python replay.py LOG --realtime --window
+    python replay.py LOG --repeat 5 --profile profile.csv
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from headless import HeadlessGame
+from input_log import read_input_log
+from profiler import profiler
+from settings import Settings
+import game_functions as gf
+
+class ReplayGame(HeadlessGame):
+    """Feed a recorded input log back through game_functions.
+
+    Every frame applies the recorded gesture and events and then runs the
+    recorded number of simulation steps, exactly as run_game() did, so the
+    game plays out the same way each time.
+    """
+
+    def __init__(self, path, render=False):
+        """Load the log and set up a game matching the recorded one."""
+        self.header, self.frames = read_input_log(path)
+        ai_settings = Settings()
+        ai_settings.simulation_rate = self.header.simulation_rate
+        ai_settings.screen_width = self.header.screen_width
+        ai_settings.screen_height = self.header.screen_height
+        # The pauses took up recorded steps, so they have to be replayed too.
+        super().__init__(ai_settings, render=render, pauses=True)
+        self.reset()
+
+    def reset(self):
+        """Put the game back to the state the session started in."""
+        random.seed(self.header.seed)
+        self.ai_settings.initialize_dynamic_settings()
+        self.stats.reset_stats()
+        self.stats.game_active = False
+        self.stats.high_score = self.header.high_score
+        self.sb.prep_score()
+        self.sb.prep_high_score()
+        self.sb.prep_level()
+        self.sb.prep_ships()
+        self.aliens.empty()
+        self.bullets.empty()
+        self.ship.center_ship()
+        gf.create_fleet(self.ai_settings, self.screen, self.ship, self.aliens)
+        self.renderer.invalidate()
+        self.steps = 0
+
+    def play_frame(self, frame):
+        """Apply one recorded frame's inputs and simulation steps."""
+        gf.apply_hand_gesture(frame.gesture, self.ai_settings, self.screen,
+                              self.stats, self.ship, self.bullets)
+        gf.check_events(self.ai_settings, self.screen, self.stats, self.sb,
+                        self.play_button, self.ship, self.aliens, self.bullets,
+                        frame.events)
+        for _ in range(frame.steps):
+            self.steps += 1
+            if not self.stats.game_active:
+                continue
+            with profiler.phase('update'):
+                gf.update_game(self.ai_settings, self.screen, self.stats, self.sb,
+                               self.ship, self.aliens, self.bullets, self.time_step)
+        if self.render:
+            with profiler.phase('render'):
+                self.renderer.update_screen(self.stats, self.sb, self.ship,
+                                            self.aliens, self.bullets, self.play_button)
+        else:
+            # Nothing draws the gesture feedback, so don't let it pile up.
+            del gf.pending_feedback[:]
+
+    def play(self, realtime=False):
+        """Play every frame, paced as recorded or as fast as possible."""
+        start = time.perf_counter()
+        elapsed_ms = 0
+        for frame in self.frames:
+            if realtime:
+                elapsed_ms += frame.frame_ms
+                delay = start + elapsed_ms / 1000 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.play_frame(frame)
+            profiler.end_frame()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log')
+    parser.add_argument('--realtime', action='store_true',
+                        help="pace frames as recorded instead of as fast as possible")
+    parser.add_argument('--window', action='store_true',
+                        help="show the game in a window (implies drawing)")
+    parser.add_argument('--render', action='store_true',
+                        help="draw every frame, to the dummy display unless --window")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write phase timings to this .json or .csv file")
+    args = parser.parse_args()
+
+    if args.window:
+        # headless.py only defaults to the dummy driver; undo that.
+        os.environ.pop('SDL_VIDEODRIVER', None)
+    profiler.enabled = bool(args.profile)
+
+    game = ReplayGame(args.log, render=args.render or args.window)
+    for run in range(args.repeat):
+        if run:
+            game.reset()
+        start = time.perf_counter()
+        game.play(args.realtime)
+        elapsed = time.perf_counter() - start
+        print(f"{len(game.frames)} frames, {game.steps} steps in {elapsed:.2f} s; "
+              f"score {game.stats.score}, level {game.stats.level}")
+
+    if args.profile:
+        profiler.export(args.profile)
+
+if __name__ == '__main__':
+    sys.exit(main())
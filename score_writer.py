@@ -0,0 +1,100 @@
+import threading
+
+from profiler import profiler
+
+class HighScoreWriter():
+    """Save high scores on a background thread, off the game loop.
+
+    Submitted scores wait in a queue that keeps only the highest score
+    per player, and are written every flush_interval seconds or when
+    flush() is called. Submitting never waits on the database.
+    """
+
+    def __init__(self, auth, flush_interval=2.0, on_written=None):
+        """Start the writer thread.
+
+        on_written, if given, is called on the writer thread with the
+        username and score after each write that changed a high score.
+        """
+        self.auth = auth
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.running = True
+
+        # Scores submitted, written and failed to write.
+        self.queued = 0
+        self.flushed = 0
+        self.failed = 0
+
+        self.thread = threading.Thread(target=self._run, name="score-writer",
+                                       daemon=True)
+        self.thread.start()
+
+    def submit(self, username, score):
+        """Queue score to be saved, replacing any lower queued score."""
+        with self.lock:
+            self.queued += 1
+            if score > self.pending.get(username, score - 1):
+                self.pending[username] = score
+            self.idle.clear()
+
+    def flush(self, wait=False, timeout=None):
+        """Write queued scores now; optionally wait until they're written.
+
+        Returns False if waiting timed out.
+        """
+        self.wake.set()
+        if wait:
+            return self.idle.wait(timeout)
+        return True
+
+    def stop(self, timeout=5.0):
+        """Write what's queued and stop the thread."""
+        self.running = False
+        self.wake.set()
+        self.thread.join(timeout)
+
+    def counters(self):
+        """Return the queued, flushed and failed counts."""
+        return {'queued': self.queued, 'flushed': self.flushed,
+                'failed': self.failed}
+
+    def _run(self):
+        """Write queued scores every interval, or when woken."""
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self._write_pending()
+            if not self.running:
+                return
+
+    def _write_pending(self):
+        """Write and clear every queued score."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        for username, score in pending.items():
+            try:
+                with profiler.phase('mongo.save_high_score'):
+                    changed = self.auth.save_high_score(username, score)
+            except Exception as e:
+                print(f"Error saving high score: {e}")
+                self.failed += 1
+                # Keep it for the next flush, unless a higher one came in.
+                with self.lock:
+                    if score > self.pending.get(username, score - 1):
+                        self.pending[username] = score
+                continue
+            self.flushed += 1
+            if changed and self.on_written:
+                self.on_written(username, score)
+
+        with self.lock:
+            if not self.pending:
+                self.idle.set()
@@ -1,6 +1,6 @@
-import pygame.font
 from pygame.sprite import Group
 
+import assets
 from ship import Ship
 
 class Scoreboard():
@@ -15,7 +15,11 @@ class Scoreboard():
         
         # Font settings for scoring information.
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font_size = 48
+        
+        # Optional LeaderboardOverlay and ProfilerOverlay, drawn with the score.
+        self.leaderboard = None
+        self.profile_overlay = None
 
         # Prepare the initial score images.
         self.prep_score()
@@ -27,8 +31,8 @@ class Scoreboard():
         """Turn the score into a rendered image."""
         rounded_score = int(round(self.stats.score, -1))
         score_str = "{:,}".format(rounded_score)
-        self.score_image = self.font.render(score_str, True, self.text_color,
-            self.ai_settings.bg_color)
+        self.score_image = assets.render_text(score_str, self.font_size,
+            self.text_color, self.ai_settings.bg_color)
             
         # Display the score at the top right of the screen.
         self.score_rect = self.score_image.get_rect()
@@ -39,8 +43,8 @@ class Scoreboard():
         """Turn the high score into a rendered image."""
         high_score = int(round(self.stats.high_score, -1))
         high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font.render(high_score_str, True,
-            self.text_color, self.ai_settings.bg_color)
+        self.high_score_image = assets.render_text(high_score_str,
+            self.font_size, self.text_color, self.ai_settings.bg_color)
                 
         # Center the high score at the top of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
@@ -49,8 +53,8 @@ class Scoreboard():
         
     def prep_level(self):
         """Turn the level into a rendered image."""
-        self.level_image = self.font.render(str(self.stats.level), True,
-                self.text_color, self.ai_settings.bg_color)
+        self.level_image = assets.render_text(str(self.stats.level),
+                self.font_size, self.text_color, self.ai_settings.bg_color)
         
         # Position the level below the score.
         self.level_rect = self.level_image.get_rect()
@@ -73,3 +77,7 @@ class Scoreboard():
         self.screen.blit(self.level_image, self.level_rect)
         # Draw ships.
         self.ships.draw(self.screen)
+        if self.leaderboard:
+            self.leaderboard.draw()
+        if self.profile_overlay:
+            self.profile_overlay.draw()
@@ -7,9 +7,45 @@ class Settings():
         self.screen_width = 1200
         self.screen_height = 800
         self.bg_color = (230, 230, 230)
+        # 'dirty' redraws and pushes only the parts of the screen that
+        # changed; 'full' redraws and flips the whole screen every frame.
+        self.render_mode = 'dirty'
+        
+        # Timing settings.
+        # The simulation advances in fixed steps of 1 / simulation_rate
+        # seconds; frames are capped separately while playing and idle.
+        self.simulation_rate = 120
+        self.max_steps_per_frame = 5
+        self.frame_cap = 60
+        self.idle_frame_cap = 15
+        # Draw moving objects between simulation steps for smoother motion.
+        self.interpolate = True
+        
+        # Profiling settings.
+        # F3 shows per-phase frame timings. Set profile_export_path to a
+        # .json or .csv file to also profile all the time and write the
+        # timings there every profile_export_interval seconds.
+        self.profile_export_path = None
+        self.profile_export_interval = 10.0
+        
+        # Every session's inputs are recorded to this directory, for
+        # replay.py to play back; None turns recording off.
+        self.recording_dir = 'recordings'
+        
+        # Hand tracking settings.
+        # Adaptive tracking crops inference to the hand, skips frames where
+        # nothing moved and lowers model complexity and resolution to keep
+        # each inference within the budget (seconds).
+        self.adaptive_hand_tracking = True
+        self.hand_frame_budget = 0.025
         
         # Ship settings.
         self.ship_limit = 3
+        # Seconds to hold the game still after the ship is hit, and after
+        # a new level's fleet appears. Frames, the camera and hand
+        # tracking keep running meanwhile.
+        self.ship_hit_pause = 0.5
+        self.level_pause = 0.5
             
         # Bullet settings.
         self.bullet_width = 3
@@ -19,6 +55,16 @@ class Settings():
         
         # Alien settings.
         self.fleet_drop_speed = 10
+        # Aliens sit alien_spacing alien widths/heights apart, in as many
+        # rows as fill fleet_height of the room above the ship. If
+        # alien_width is set, the alien image is scaled to that width.
+        self.alien_width = None
+        self.alien_spacing = 2
+        self.fleet_height = 1.0
+        
+        # Swarm mode is a load test: a dense fleet of tiny aliens and
+        # hundreds of bullets. Set swarm_mode to True to play it.
+        self.swarm_mode = False
             
         # How quickly the game speeds up.
         self.speedup_scale = 1.1
@@ -26,12 +72,23 @@ class Settings():
         self.score_scale = 1.5
     
         self.initialize_dynamic_settings()
+        if self.swarm_mode:
+            self.use_swarm_mode()
+
+    def use_swarm_mode(self, alien_width=5):
+        """Switch to swarm mode: over 10,000 aliens on the default screen."""
+        self.swarm_mode = True
+        self.alien_width = alien_width
+        self.alien_spacing = 1.25
+        self.fleet_height = 0.6
+        self.bullets_allowed = 300
 
     def initialize_dynamic_settings(self):
         """Initialize settings that change throughout the game."""
-        self.ship_speed_factor = 1.5
-        self.bullet_speed_factor = 3
-        self.alien_speed_factor = 1
+        # Speeds are in pixels per second.
+        self.ship_speed_factor = 90
+        self.bullet_speed_factor = 180
+        self.alien_speed_factor = 60
         
         # Scoring.
         self.alien_points = 50
@@ -1,6 +1,7 @@
-import pygame
 from pygame.sprite import Sprite
 
+import assets
+
 class Ship(Sprite):
 
     def __init__(self, ai_settings, screen):
@@ -10,7 +11,7 @@ class Ship(Sprite):
         self.ai_settings = ai_settings
 
         # Load the ship image, and get its rect.
-        self.image = pygame.image.load('images/ship.bmp')
+        self.image = assets.load_image('images/ship.bmp')
         self.rect = self.image.get_rect()
         self.screen_rect = screen.get_rect()
 
@@ -20,6 +21,8 @@ class Ship(Sprite):
         
         # Store a decimal value for the ship's center.
         self.center = float(self.rect.centerx)
+        # Where the center was before the last update, for interpolation.
+        self.prev_center = self.center
         
         # Movement flags.
         self.moving_right = False
@@ -28,18 +31,27 @@ class Ship(Sprite):
     def center_ship(self):
         """Center the ship on the screen."""
         self.center = self.screen_rect.centerx
+        self.prev_center = self.center
         
-    def update(self):
-        """Update the ship's position, based on movement flags."""
+    def update(self, dt):
+        """Update the ship's position over dt seconds, based on movement flags."""
+        self.prev_center = self.center
         # Update the ship's center value, not the rect.
         if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.center += self.ai_settings.ship_speed_factor
+            self.center += self.ai_settings.ship_speed_factor * dt
         if self.moving_left and self.rect.left > 0:
-            self.center -= self.ai_settings.ship_speed_factor
+            self.center -= self.ai_settings.ship_speed_factor * dt
             
         # Update rect object from self.center.
         self.rect.centerx = self.center
 
-    def blitme(self):
-        """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+    def blitme(self, alpha=1.0):
+        """Draw the ship, alpha of the way from its last position to its current one.
+
+        Returns the rect drawn.
+        """
+        if alpha < 1.0:
+            draw_rect = self.rect.copy()
+            draw_rect.centerx = self.prev_center + (self.center - self.prev_center) * alpha
+            return self.screen.blit(self.image, draw_rect)
+        return self.screen.blit(self.image, self.rect)
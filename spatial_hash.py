@@ -0,0 +1,71 @@
+import numpy as np
+
+class SpatialHash():
+    """A uniform grid over a set of boxes, for finding which ones a box touches.
+
+    The grid is stored as the boxes' cell keys in sorted order alongside
+    the matching box indices, so building it is one argsort and finding
+    the boxes in many cells at once is one binary search. Boxes, both
+    stored and queried, must be no bigger than a cell, so each covers at
+    most two cells along each axis.
+    """
+
+    def __init__(self, cell_size):
+        """Initialize an empty grid with square cells of cell_size pixels."""
+        self.cell_size = cell_size
+        self.keys = np.empty(0, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int64)
+
+    def _cover(self, left, top, right, bottom):
+        """Return the cell keys covered by each box, and which box each key is for.
+
+        Every box gets four keys, one per corner, so a box inside a single
+        cell column or row lists the same key more than once.
+        """
+        size = self.cell_size
+        # Offset so cells just off the top or left still get distinct keys.
+        cx0 = left // size + (1 << 20)
+        cx1 = (right - 1) // size + (1 << 20)
+        cy0 = (top // size + (1 << 20)) << 21
+        cy1 = ((bottom - 1) // size + (1 << 20)) << 21
+        keys = np.stack([cy0 + cx0, cy0 + cx1, cy1 + cx0, cy1 + cx1], axis=1).ravel()
+        return keys, np.repeat(np.arange(len(left)), 4)
+
+    def rebuild(self, left, top, width, height):
+        """Index the width x height boxes at (left, top), numbered in order."""
+        keys, owners = self._cover(left, top, left + width, top + height)
+        order = np.lexsort((owners, keys))
+        keys, owners = keys[order], owners[order]
+
+        # Drop the repeated corner keys so each box is listed once per cell.
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+        self.keys = keys[keep]
+        self.indices = owners[keep]
+
+    def share(self, other):
+        """Index the same boxes as other, without copying its index.
+
+        rebuild() replaces the index rather than changing it, so the two
+        grids can be rebuilt independently afterwards.
+        """
+        self.keys = other.keys
+        self.indices = other.indices
+
+    def query(self, left, top, right, bottom):
+        """Find the stored boxes sharing a cell with each query box.
+
+        Returns two arrays of equal length pairing query box numbers with
+        stored box indices. A pair can appear more than once when the two
+        boxes share more than one cell, or a query box lists a cell twice.
+        """
+        keys, owners = self._cover(left, top, right, bottom)
+        starts = np.searchsorted(self.keys, keys, side='left')
+        counts = np.searchsorted(self.keys, keys, side='right') - starts
+
+        # Expand each [start, start + count) run of the index into pairs.
+        total = counts.sum()
+        run_starts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        queries = np.repeat(owners, counts)
+        boxes = self.indices[run_starts + np.arange(total)]
+        return queries, boxes